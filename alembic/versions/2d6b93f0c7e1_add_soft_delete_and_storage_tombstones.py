@@ -0,0 +1,45 @@
+"""Add soft delete and storage tombstones
+
+Revision ID: 2d6b93f0c7e1
+Revises: e81b6c0a4f57
+Create Date: 2026-10-19 21:12:03.584126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d6b93f0c7e1'
+down_revision: Union[str, None] = 'e81b6c0a4f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('audio_files', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table('storage_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('audio_id', sa.Integer(), nullable=True),
+    sa.Column('purge_after', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['audio_id'], ['audio_files.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('audio_id')
+    )
+    op.create_index(op.f('ix_storage_tombstones_id'), 'storage_tombstones', ['id'], unique=False)
+    op.create_index(op.f('ix_storage_tombstones_purge_after'), 'storage_tombstones', ['purge_after'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_storage_tombstones_purge_after'), table_name='storage_tombstones')
+    op.drop_index(op.f('ix_storage_tombstones_id'), table_name='storage_tombstones')
+    op.drop_table('storage_tombstones')
+    op.drop_column('audio_files', 'deleted_at')
@@ -0,0 +1,44 @@
+"""Add audio size/duration columns and search indexes
+
+Revision ID: 3f1c2a7d9b40
+Revises: 9db373d5ecc8
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b40'
+down_revision: Union[str, None] = '9db373d5ecc8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('audio_files', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('audio_files', sa.Column('duration', sa.Float(), nullable=True))
+    op.create_index('ix_audio_files_original_filename_trgm', 'audio_files', ['original_filename'], unique=False, postgresql_using='gin', postgresql_ops={'original_filename': 'gin_trgm_ops'})
+    op.create_index('ix_audio_files_user_id_created_at', 'audio_files', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_audio_files_user_id_content_type_created_at', 'audio_files', ['user_id', 'content_type', 'created_at'], unique=False)
+    op.create_index('ix_audio_files_user_id_original_filename', 'audio_files', ['user_id', 'original_filename'], unique=False)
+    op.create_index('ix_audio_files_user_id_size', 'audio_files', ['user_id', 'size'], unique=False)
+    op.create_index('ix_audio_files_user_id_duration', 'audio_files', ['user_id', 'duration'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audio_files_user_id_duration', table_name='audio_files')
+    op.drop_index('ix_audio_files_user_id_size', table_name='audio_files')
+    op.drop_index('ix_audio_files_user_id_original_filename', table_name='audio_files')
+    op.drop_index('ix_audio_files_user_id_content_type_created_at', table_name='audio_files')
+    op.drop_index('ix_audio_files_user_id_created_at', table_name='audio_files')
+    op.drop_index('ix_audio_files_original_filename_trgm', table_name='audio_files')
+    op.drop_column('audio_files', 'duration')
+    op.drop_column('audio_files', 'size')
+    # pg_trgm is left installed: other objects may depend on it
@@ -0,0 +1,30 @@
+"""Add fingerprint claim timestamp to audio files
+
+Revision ID: 4b8e2d7a6c15
+Revises: 8f3a5c2e9b71
+Create Date: 2026-10-20 10:12:48.530927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e2d7a6c15'
+down_revision: Union[str, None] = '8f3a5c2e9b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('audio_files', sa.Column('fingerprint_claimed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_audio_files_fingerprint_processing', 'audio_files', ['fingerprint_claimed_at'], unique=False, postgresql_where=sa.text("fingerprint_status = 'processing'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audio_files_fingerprint_processing', table_name='audio_files', postgresql_where=sa.text("fingerprint_status = 'processing'"))
+    op.drop_column('audio_files', 'fingerprint_claimed_at')
@@ -0,0 +1,34 @@
+"""Add audio checksum and integrity status columns
+
+Revision ID: 5a9e8c31d7f2
+Revises: b7e04d1f6a2c
+Create Date: 2026-10-19 15:20:33.471865
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9e8c31d7f2'
+down_revision: Union[str, None] = 'b7e04d1f6a2c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('audio_files', sa.Column('checksum', sa.String(length=64), nullable=True))
+    op.add_column('audio_files', sa.Column('integrity_status', sa.String(), nullable=True))
+    op.add_column('audio_files', sa.Column('verified_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_audio_files_integrity_problems', 'audio_files', ['integrity_status'], unique=False, postgresql_where=sa.text("integrity_status <> 'ok'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audio_files_integrity_problems', table_name='audio_files', postgresql_where=sa.text("integrity_status <> 'ok'"))
+    op.drop_column('audio_files', 'verified_at')
+    op.drop_column('audio_files', 'integrity_status')
+    op.drop_column('audio_files', 'checksum')
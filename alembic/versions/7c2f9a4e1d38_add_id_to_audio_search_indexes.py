@@ -0,0 +1,41 @@
+"""Add id to the per-user audio search indexes
+
+Revision ID: 7c2f9a4e1d38
+Revises: 4b8e2d7a6c15
+Create Date: 2026-10-20 14:03:27.614902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f9a4e1d38'
+down_revision: Union[str, None] = '4b8e2d7a6c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> sort columns after user_id
+INDEXES = {
+    'ix_audio_files_user_id_created_at': ['created_at'],
+    'ix_audio_files_user_id_content_type_created_at': ['content_type', 'created_at'],
+    'ix_audio_files_user_id_original_filename': ['original_filename'],
+    'ix_audio_files_user_id_size': ['size'],
+    'ix_audio_files_user_id_duration': ['duration'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in INDEXES.items():
+        op.drop_index(name, table_name='audio_files')
+        op.create_index(name, 'audio_files', ['user_id', *columns, 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, columns in INDEXES.items():
+        op.drop_index(name, table_name='audio_files')
+        op.create_index(name, 'audio_files', ['user_id', *columns], unique=False)
@@ -0,0 +1,28 @@
+"""Add library version to user library stats
+
+Revision ID: 8f3a5c2e9b71
+Revises: 2d6b93f0c7e1
+Create Date: 2026-10-19 22:47:31.902215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3a5c2e9b71'
+down_revision: Union[str, None] = '2d6b93f0c7e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_library_stats', sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_library_stats', 'version')
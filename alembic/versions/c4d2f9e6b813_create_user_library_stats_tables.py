@@ -0,0 +1,57 @@
+"""Create user library stats tables
+
+Revision ID: c4d2f9e6b813
+Revises: 5a9e8c31d7f2
+Create Date: 2026-10-19 16:58:12.604390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2f9e6b813'
+down_revision: Union[str, None] = '5a9e8c31d7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_library_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('file_count', sa.BigInteger(), nullable=False),
+    sa.Column('total_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('user_library_stats_breakdown',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('file_count', sa.BigInteger(), nullable=False),
+    sa.Column('total_bytes', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'content_type', 'month')
+    )
+    # backfill from existing files; afterwards uploads and deletes keep the tables current
+    op.execute("""
+        INSERT INTO user_library_stats (user_id, file_count, total_bytes)
+        SELECT user_id, count(*), coalesce(sum(size), 0) FROM audio_files GROUP BY user_id
+    """)
+    op.execute("""
+        INSERT INTO user_library_stats_breakdown (user_id, content_type, month, file_count, total_bytes)
+        SELECT user_id, coalesce(content_type, ''), date_trunc('month', timezone('UTC', created_at))::date,
+               count(*), coalesce(sum(size), 0)
+        FROM audio_files
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_library_stats_breakdown')
+    op.drop_table('user_library_stats')
@@ -0,0 +1,61 @@
+"""Create audio fingerprint and duplicate tables
+
+Revision ID: e81b6c0a4f57
+Revises: c4d2f9e6b813
+Create Date: 2026-10-19 19:05:48.217530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b6c0a4f57'
+down_revision: Union[str, None] = 'c4d2f9e6b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('audio_files', sa.Column('fingerprint_hash_count', sa.Integer(), nullable=True))
+    op.add_column('audio_files', sa.Column('fingerprint_status', sa.String(), nullable=True))
+    op.add_column('audio_files', sa.Column('fingerprinted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_audio_files_fingerprint_pending', 'audio_files', ['id'], unique=False, postgresql_where=sa.text('fingerprint_status IS NULL'))
+    op.create_table('audio_fingerprints',
+    sa.Column('hash', sa.Integer(), nullable=False),
+    sa.Column('audio_id', sa.Integer(), nullable=False),
+    sa.Column('time_offset', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['audio_id'], ['audio_files.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('hash', 'audio_id', 'time_offset')
+    )
+    op.create_index('ix_audio_fingerprints_audio_id', 'audio_fingerprints', ['audio_id'], unique=False)
+    op.create_table('audio_duplicates',
+    sa.Column('audio_id', sa.Integer(), nullable=False),
+    sa.Column('duplicate_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('duplicate_user_id', sa.Integer(), nullable=False),
+    sa.Column('matches', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['audio_id'], ['audio_files.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['duplicate_id'], ['audio_files.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('audio_id', 'duplicate_id')
+    )
+    op.create_index('ix_audio_duplicates_user_id_duplicate_user_id', 'audio_duplicates', ['user_id', 'duplicate_user_id'], unique=False)
+    op.create_index('ix_audio_duplicates_duplicate_id', 'audio_duplicates', ['duplicate_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audio_duplicates_duplicate_id', table_name='audio_duplicates')
+    op.drop_index('ix_audio_duplicates_user_id_duplicate_user_id', table_name='audio_duplicates')
+    op.drop_table('audio_duplicates')
+    op.drop_index('ix_audio_fingerprints_audio_id', table_name='audio_fingerprints')
+    op.drop_table('audio_fingerprints')
+    op.drop_index('ix_audio_files_fingerprint_pending', table_name='audio_files', postgresql_where=sa.text('fingerprint_status IS NULL'))
+    op.drop_column('audio_files', 'fingerprinted_at')
+    op.drop_column('audio_files', 'fingerprint_status')
+    op.drop_column('audio_files', 'fingerprint_hash_count')
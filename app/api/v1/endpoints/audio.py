@@ -1,19 +1,32 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
 import os
+import pathlib
+import time
 import uuid
 import aiofiles
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-import pathlib
 
 from app import crud, models, schemas
-from app.deps import get_db, get_current_active_user
+from app.deps import get_db, get_current_active_user, get_idempotency_key
+from app.core import events, idempotency, security, storage, tracing
+from app.core.cache import response_cache
 from app.core.config import settings
+from app.core.zipstream import ZipEntry, stream_zip
+from app.db.session import AsyncSessionLocal
 
-router = APIRouter()
+router = APIRouter(route_class=tracing.TracedRoute)
 
 # ensure upload directory exists
-UPLOAD_DIR = pathlib.Path(settings.UPLOAD_DIR)
+UPLOAD_DIR = storage.UPLOAD_DIR
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 def sanitize_filename(filename: str) -> str:
@@ -25,18 +38,9 @@ def sanitize_filename(filename: str) -> str:
     safe_base = safe_base[:100]
     return f"{safe_base}{ext}"
 
-@router.post("/upload", response_model=schemas.Audio, status_code=status.HTTP_201_CREATED)
-async def upload_audio(
-    *,
-    db: AsyncSession = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
-    file: UploadFile = File(..., description="The audio file to upload"),
-    file_name: Optional[str] = Form(None, description="Optional custom name for the file")
-):
-    """
-    Uploads an audio file for the current user.
-    User can optionally provide a 'file_name' in the form data.
-    """
+async def _store_upload(
+    db: AsyncSession, current_user: models.User, file: UploadFile, file_name: Optional[str]
+) -> models.AudioFile:
     # validate file type 
     allowed_content_types = ["audio/mpeg", "audio/wav", "audio/ogg", "audio/aac", "audio/flac"]
     if file.content_type not in allowed_content_types:
@@ -55,17 +59,23 @@ async def upload_audio(
     _, ext = os.path.splitext(file.filename or "audio")
     stored_filename = f"{uuid.uuid4()}{ext}"
 
-    # define the relative path for storage (e.g., user_id/stored_filename)
-    user_upload_dir = UPLOAD_DIR / str(current_user.id)
-    user_upload_dir.mkdir(parents=True, exist_ok=True) # Ensure user-specific dir exists
-    relative_file_path = pathlib.Path(str(current_user.id)) / stored_filename
-    full_file_path = UPLOAD_DIR / relative_file_path
+    # define the relative path for storage (e.g., user_id/ab/cd/stored_filename)
+    relative_file_path = storage.relative_path_for(current_user.id, stored_filename)
+    full_file_path = storage.full_path(relative_file_path)
+    full_file_path.parent.mkdir(parents=True, exist_ok=True) # Ensure user-specific shard dir exists
 
+    file_size = 0
+    checksum = hashlib.sha256()
     try:
         # save the file
-        async with aiofiles.open(full_file_path, "wb") as out_file:
-            while content := await file.read(1024 * 1024): # read chunk by chunk (1MB)
-                await out_file.write(content)
+        with tracing.span("disk") as disk_span:
+            async with aiofiles.open(full_file_path, "wb") as out_file:
+                while content := await file.read(1024 * 1024): # read chunk by chunk (1MB)
+                    await out_file.write(content)
+                    file_size += len(content)
+                    checksum.update(content)
+            if disk_span is not None:
+                disk_span.attributes["file.size"] = file_size
     except Exception as e:
         print(f"Error saving file: {e}")
         if full_file_path.exists():
@@ -81,28 +91,318 @@ async def upload_audio(
         stored_filename=stored_filename, # store the unique name used on disk
         file_path=str(relative_file_path), # store relative path
         content_type=file.content_type,
+        size=file_size,
+        checksum=checksum.hexdigest(),
         user_id=current_user.id,
     )
 
     return audio_in_db
 
+def _upload_request_hash(file: UploadFile, file_name: Optional[str]) -> str:
+    # tells a retry apart from a different file sent with the same Idempotency-Key
+    fields = [file.filename, file_name, file.content_type, file.size]
+    return f"POST /audio/upload {hashlib.sha256(json.dumps(fields).encode()).hexdigest()}"
+
+@router.post("/upload", response_model=schemas.Audio, status_code=status.HTTP_201_CREATED)
+async def upload_audio(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+    file: UploadFile = File(..., description="The audio file to upload"),
+    file_name: Optional[str] = Form(None, description="Optional custom name for the file")
+):
+    """
+    Uploads an audio file for the current user.
+    User can optionally provide a 'file_name' in the form data.
+    With an Idempotency-Key header, retries return the original result instead of uploading again.
+    """
+    claim = await idempotency.begin(
+        db, user_id=current_user.id, key=idempotency_key, request_hash=_upload_request_hash(file, file_name)
+    )
+    if claim.replay is not None:
+        await file.close()
+        return claim.replay
+    audio_in_db = None
+    try:
+        audio_in_db = await _store_upload(db, current_user, file, file_name)
+        audio_out = schemas.Audio.model_validate(audio_in_db)
+        await events.publish(db, user_id=current_user.id, event_type="upload-complete", data=jsonable_encoder(audio_out))
+        # the row, the event and the completed key are committed together
+        await idempotency.complete(db, claim, status_code=status.HTTP_201_CREATED, body=audio_out)
+    except BaseException:
+        await idempotency.abandon(db, claim)
+        if audio_in_db is not None:
+            storage.full_path(audio_in_db.file_path).unlink(missing_ok=True) # its row was rolled back
+        raise
+    return audio_in_db
+
+
+async def _cached_json(
+    db: AsyncSession, *, user_id: int, name: str, params: Dict[str, Any], build: Callable[[], Awaitable[Any]]
+) -> Response:
+    # keyed on the library version, so any write to the user's files makes old entries unreachable
+    if not settings.RESPONSE_CACHE_ENABLED:
+        data = await build()
+        with tracing.span("serialize"):
+            return JSONResponse(jsonable_encoder(data))
+    version = await crud.library_stats.get_version(db=db, user_id=user_id)
+    key = response_cache.key(user_id, version, name, params)
+    body = await response_cache.get(key)
+    cache_status = "hit"
+    if body is None:
+        data = await build() # errors raised by build() are not cached
+        with tracing.span("serialize"):
+            body = JSONResponse(jsonable_encoder(data)).body
+        await response_cache.set(key, body)
+        cache_status = "miss"
+    return Response(content=body, media_type="application/json", headers={"X-Cache": cache_status})
 
 @router.get("/", response_model=List[schemas.Audio])
 async def list_user_audio_files(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
+    filters: schemas.AudioFilter = Depends(),
+    sort: schemas.AudioSortField = schemas.AudioSortField.created_at,
     skip: int = 0,
     limit: int = 100
 ):
     """
     Get a list of audio files uploaded by the current user.
-    Returns original filename and the relative path for reference.
+    Supports filtering by filename substring, content type, creation date,
+    size and duration ranges, and server-side sorting ('-' prefix for descending).
+    """
+    async def build():
+        audio_files = await crud.audio_file.search_by_owner(
+            db=db, user_id=current_user.id, filters=filters, sort=sort, skip=skip, limit=limit
+        )
+        return [schemas.Audio.model_validate(audio) for audio in audio_files]
+
+    params = {**filters.model_dump(), "sort": sort.value, "skip": skip, "limit": limit}
+    return await _cached_json(db, user_id=current_user.id, name="audio-list", params=params, build=build)
+
+@router.get("/stats", response_model=schemas.LibraryStats)
+async def get_library_stats(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    File count and total size of the current user's library, broken down by
+    content type and month. Served from incrementally maintained counters.
+    """
+    stats = await crud.library_stats.get_for_user(db=db, user_id=current_user.id)
+    if not stats:
+        return schemas.LibraryStats()
+    by_content_type: dict = {}
+    by_month: dict = {}
+    for row in await crud.library_stats.get_breakdown_for_user(db=db, user_id=current_user.id):
+        for buckets, key in ((by_content_type, row.content_type), (by_month, row.month)):
+            count, size = buckets.get(key, (0, 0))
+            buckets[key] = (count + row.file_count, size + row.total_bytes)
+    return schemas.LibraryStats(
+        file_count=stats.file_count,
+        total_bytes=stats.total_bytes,
+        by_content_type=[
+            schemas.ContentTypeStats(content_type=k, file_count=c, total_bytes=b)
+            for k, (c, b) in sorted(by_content_type.items())
+        ],
+        by_month=[
+            schemas.MonthStats(month=k, file_count=c, total_bytes=b)
+            for k, (c, b) in sorted(by_month.items())
+        ],
+    )
+
+@router.get("/duplicates", response_model=List[schemas.AudioDuplicatePair])
+async def list_duplicate_audio_files(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    all_users: bool = Query(False, description="Include pairs across all users (Superuser only)"),
+    min_score: float = Query(0.0, ge=0, le=1),
+    skip: int = 0,
+    limit: int = 100
+):
+    """
+    List likely duplicates (e.g. the same track uploaded as MP3 and FLAC),
+    as detected by the background fingerprint job. Most similar pairs first.
+    """
+    if all_users and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges")
+    rows = await crud.fingerprint.get_duplicates(
+        db=db, user_id=None if all_users else current_user.id, min_score=min_score, skip=skip, limit=limit
+    )
+    return [
+        schemas.AudioDuplicatePair(
+            audio=schemas.Audio.model_validate(first),
+            duplicate=schemas.Audio.model_validate(second),
+            matches=pair.matches,
+            score=pair.score,
+        )
+        for pair, first, second in rows
+    ]
+
+async def _event_stream(user_id: int):
+    # subscribing inside the generator means cleanup always runs in `finally`,
+    # including when the client disconnects before the first event
+    subscription = events.broker.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    # streams are recycled so they rebalance across workers and don't hold up a restart for long
+    deadline = loop.time() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=min(settings.EVENTS_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n" # also how a disconnected client is noticed while idle
+                continue
+            if event is None:
+                return # closed by the server; the client reconnects
+            yield f"event: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+    finally:
+        events.broker.unsubscribe(subscription)
+
+@router.get("/events")
+async def stream_audio_events(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Server-sent event stream of the current user's library changes:
+    `upload-complete`, `processing-progress` (fingerprinting) and `delete`.
+    Use it instead of polling `GET /audio/{audio_id}`.
+    """
+    await db.close() # don't hold a pooled connection for the lifetime of the stream
+    return StreamingResponse(
+        _event_stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+EXPORT_BATCH_SIZE = 500
+
+async def _iter_export_entries(user_id: int, filters: schemas.AudioFilter):
+    # a fresh short-lived session per batch, so no connection is pinned while the client downloads
+    after_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            batch = await crud.audio_file.get_batch_by_owner_after(
+                db=db, user_id=user_id, after_id=after_id, limit=EXPORT_BATCH_SIZE, filters=filters
+            )
+        if not batch:
+            return
+        for audio in batch:
+            yield ZipEntry(
+                name=f"{audio.id}_{audio.original_filename}", # prefix with id, names are not unique
+                path=str(storage.full_path(audio.file_path)),
+                modified=audio.created_at,
+                size=audio.size,
+                content_type=audio.content_type,
+            )
+        after_id = batch[-1].id
+
+@router.get("/export.zip", response_class=StreamingResponse)
+async def export_audio_files(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    filters: schemas.AudioFilter = Depends(),
+):
+    """
+    Stream a ZIP archive of the current user's audio files (optionally filtered).
+    The archive is generated on the fly and never buffered in full.
     """
-    audio_files = await crud.audio_file.get_multi_by_owner(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
+    await db.close() # the auth session would otherwise stay checked out until the download ends
+    return StreamingResponse(
+        stream_zip(_iter_export_entries(current_user.id, filters)),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="audio-export.zip"'},
+    )
+
+def _signed_file_uri(file_path: str) -> str:
+    # the exact URI that is signed; a front proxy sees the same value as $uri
+    return f"{settings.API_V1_STR}/audio/files/{file_path}"
+
+def _parse_single_range(range_header: str) -> Optional[Tuple[int, Optional[int]]]:
+    # only "bytes=start-" and "bytes=start-end" are accepted for range-bound URLs
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    if not start.isdigit() or (end and not end.isdigit()):
+        return None
+    return int(start), int(end) if end else None
+
+async def _iter_file_range(path: pathlib.Path, start: int, end: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(1024 * 1024, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@router.get("/files/{file_path:path}", response_class=FileResponse)
+async def serve_signed_file(
+    request: Request,
+    file_path: str,
+    st: str = Query(..., description="Signature"),
+    ts: int = Query(..., description="Issued at (unix time)"),
+    e: int = Query(..., description="Lifetime in seconds"),
+    r: str = Query("", description="Byte range the URL is bound to, e.g. 0-1048575"),
+):
+    """
+    Serve a file via a URL issued by POST /audio/{audio_id}/signed-url.
+    Only the signature is checked: no JWT decode and no database access.
+    """
+    if not security.verify_file_signature(_signed_file_uri(file_path), st, ts, e, r):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+    if ".." in pathlib.PurePosixPath(file_path).parts:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    full_file_path = storage.full_path(file_path)
+    if not full_file_path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    if not r:
+        return FileResponse(full_file_path, media_type=media_type)
+
+    # range-bound URL: serve only bytes inside the signed range
+    bound_start, bound_end = (int(v) for v in r.split("-"))
+    start, end = bound_start, bound_end
+    range_header = request.headers.get("range")
+    if range_header:
+        requested = _parse_single_range(range_header)
+        if requested is None or requested[0] < bound_start or (requested[1] or bound_end) > bound_end:
+            raise HTTPException(status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE, detail="Range is outside the signed range")
+        start, end = requested[0], requested[1] if requested[1] is not None else bound_end
+    size = full_file_path.stat().st_size
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    end = min(end, size - 1)
+    return StreamingResponse(
+        _iter_file_range(full_file_path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers={
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1),
+            "Accept-Ranges": "bytes",
+        },
     )
-    return audio_files
 
 @router.get("/{audio_id}", response_model=schemas.Audio)
 async def get_audio_file_info(
@@ -112,37 +412,174 @@ async def get_audio_file_info(
     audio_id: int
 ):
     """Get details of a specific audio file owned by the current user."""
+    async def build():
+        audio = await crud.audio_file.get(db=db, id=audio_id)
+        if not audio:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+        if audio.user_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this file")
+        return schemas.Audio.model_validate(audio)
+
+    return await _cached_json(db, user_id=current_user.id, name="audio-info", params={"id": audio_id}, build=build)
+
+@router.post("/lookup", response_model=schemas.AudioLookupResult)
+async def lookup_audio_files(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    lookup_in: schemas.AudioLookupRequest
+):
+    """
+    Get details of many audio files in one call (e.g. for a playlist).
+    Files are returned in request order; ids that don't exist and ids of other
+    users' files are listed separately instead of failing the whole request.
+    """
+    if len(lookup_in.ids) > settings.AUDIO_LOOKUP_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.AUDIO_LOOKUP_MAX_IDS} ids can be looked up at once",
+        )
+    unique_ids = list(dict.fromkeys(lookup_in.ids))
+    # not filtered by owner, so a foreign id can be reported as forbidden rather than missing
+    found = {audio.id: audio for audio in await crud.audio_file.get_many(db=db, ids=unique_ids)}
+
+    missing = [audio_id for audio_id in unique_ids if audio_id not in found]
+    forbidden = [audio_id for audio_id in unique_ids if audio_id in found and found[audio_id].user_id != current_user.id]
+    items = [
+        schemas.Audio.model_validate(found[audio_id])
+        for audio_id in lookup_in.ids
+        if audio_id in found and found[audio_id].user_id == current_user.id
+    ]
+    return schemas.AudioLookupResult(items=items, missing=missing, forbidden=forbidden)
+
+@router.patch("/{audio_id}", response_model=schemas.Audio)
+async def rename_audio_file(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    audio_id: int,
+    audio_in: schemas.AudioUpdate
+):
+    """Rename an audio file owned by the current user."""
     audio = await crud.audio_file.get(db=db, id=audio_id)
     if not audio:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
     if audio.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this file")
-    return audio
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to modify this file")
+    if not audio_in.original_filename:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="original_filename must not be empty")
+    audio = await crud.audio_file.rename(db=db, audio=audio, original_filename=sanitize_filename(audio_in.original_filename))
+    audio_out = schemas.Audio.model_validate(audio)
+    await events.publish(db, user_id=audio.user_id, event_type="rename", data=jsonable_encoder(audio_out))
+    await db.commit()
+    return audio_out
 
-@router.delete("/{audio_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_audio_file(
+@router.get("/{audio_id}/download", response_class=FileResponse)
+async def download_audio_file(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
     audio_id: int
 ):
-    """Delete an audio file owned by the current user (record and file on disk)."""
+    """Download an audio file owned by the current user. Supports HTTP Range requests."""
+    audio = await crud.audio_file.get(db=db, id=audio_id)
+    if not audio:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    if audio.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this file")
+    full_file_path = storage.full_path(audio.file_path)
+    if not full_file_path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file is missing from storage")
+    return FileResponse(full_file_path, media_type=audio.content_type, filename=audio.original_filename)
+
+@router.post("/{audio_id}/signed-url", response_model=schemas.SignedUrl)
+async def create_signed_url(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    audio_id: int,
+    expires_in: int = Query(settings.SIGNED_URL_EXPIRE_SECONDS, gt=0, le=settings.SIGNED_URL_MAX_EXPIRE_SECONDS),
+    byte_range: Optional[str] = Query(None, alias="range", pattern=r"^\d+-\d+$", description="Optional byte range, e.g. 0-1048575"),
+):
+    """
+    Issue a short-lived signed URL for an audio file owned by the current user.
+    The URL can be fetched without authentication, by this API or a front proxy.
+    """
+    audio = await crud.audio_file.get(db=db, id=audio_id)
+    if not audio:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    if audio.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this file")
+    if byte_range:
+        start, end = (int(v) for v in byte_range.split("-"))
+        if start > end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid byte range")
+
+    file_path = pathlib.PurePosixPath(audio.file_path).as_posix()
+    issued_at = int(time.time())
+    token = security.sign_file_uri(_signed_file_uri(file_path), issued_at, expires_in, byte_range or "")
+    params = {"st": token, "ts": issued_at, "e": expires_in}
+    if byte_range:
+        params["r"] = byte_range
+    url = f"{quote(_signed_file_uri(file_path))}?{urlencode(params)}"
+    expires_at = datetime.fromtimestamp(issued_at + expires_in, tz=timezone.utc)
+    return schemas.SignedUrl(url=url, expires_at=expires_at)
+
+async def _delete_audio_file(db: AsyncSession, current_user: models.User, audio_id: int) -> None:
     audio = await crud.audio_file.get(db=db, id=audio_id)
     if not audio:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
     if audio.user_id != current_user.id and not current_user.is_superuser: # only superusers can delete others' files
          raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this file")
 
-    # delete file from disk
-    full_file_path = UPLOAD_DIR / audio.file_path
-    try:
-         if full_file_path.is_file():
-             full_file_path.unlink()
-    except Exception as e:
-         print(f"Error deleting file {full_file_path}: {e}")
-         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not delete file from storage: {e}")
+    # mark the record deleted; the file is removed from disk later by the reclaim job
+    purge_after = datetime.now(timezone.utc) + timedelta(seconds=settings.STORAGE_DELETE_GRACE_SECONDS)
+    if not await crud.audio_file.soft_delete(db=db, audio=audio, purge_after=purge_after):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    await events.publish(db, user_id=audio.user_id, event_type="delete", data={"id": audio_id})
 
-    # delete DB record
-    await crud.audio_file.remove(db=db, id=audio_id)
+@router.delete("/{audio_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_audio_file(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+    audio_id: int
+):
+    """
+    Delete an audio file owned by the current user.
+    The file can be restored until the reclaim job removes it from disk
+    (after settings.STORAGE_DELETE_GRACE_SECONDS).
+    """
+    claim = await idempotency.begin(db, user_id=current_user.id, key=idempotency_key, request_hash=f"DELETE /audio/{audio_id}")
+    if claim.replay is not None:
+        return claim.replay
+    try:
+        await _delete_audio_file(db, current_user, audio_id)
+        await idempotency.complete(db, claim, status_code=status.HTTP_204_NO_CONTENT) # commits the delete too
+    except BaseException:
+        await idempotency.abandon(db, claim)
+        raise
+    return None
 
-    return None
\ No newline at end of file
+@router.post("/{audio_id}/restore", response_model=schemas.Audio)
+async def restore_audio_file(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    audio_id: int
+):
+    """Undo the deletion of an audio file while it is still within the grace period."""
+    audio = await crud.audio_file.get(db=db, id=audio_id, include_deleted=True)
+    if not audio:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    if audio.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to restore this file")
+    if audio.deleted_at is None:
+        return audio # not deleted, nothing to do
+    if not await crud.audio_file.restore(db=db, audio=audio):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Audio file has already been permanently deleted")
+    audio_out = schemas.Audio.model_validate(audio)
+    await events.publish(db, user_id=audio.user_id, event_type="restore", data=jsonable_encoder(audio_out))
+    await db.commit()
+    return audio_out
\ No newline at end of file
@@ -5,12 +5,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core import security
+from app.core.tracing import TracedRoute
 from app.crud import user as crud_user
 from app.schemas.token import Token
 from app.deps import get_db, get_current_active_user
 from app.models.user import User
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 YANDEX_AUTH_URL = "https://oauth.yandex.ru/authorize"
 YANDEX_TOKEN_URL = "https://oauth.yandex.ru/token"
@@ -1,11 +1,13 @@
+from datetime import datetime, timezone
 from typing import List, Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, models, schemas
+from app.core.tracing import TracedRoute
 from app.deps import get_db, get_current_active_user, get_current_active_superuser
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.get("/me", response_model=schemas.User)
 async def read_users_me(current_user: models.User = Depends(get_current_active_user)) -> Any:
@@ -46,6 +48,25 @@ async def read_users(
     users = await crud.user.get_multi(db, skip=skip, limit=limit)
     return users
 
+@router.get("/stats", response_model=schemas.AdminLibraryStats, dependencies=[Depends(get_current_active_superuser)])
+async def read_library_stats(
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Aggregated library statistics across all users (Superuser only).
+    """
+    user_count, file_count, total_bytes = await crud.library_stats.get_totals(db)
+    by_content_type = await crud.library_stats.get_totals_by_content_type(db)
+    return schemas.AdminLibraryStats(
+        user_count=user_count,
+        file_count=file_count,
+        total_bytes=total_bytes,
+        by_content_type=[
+            schemas.ContentTypeStats(content_type=content_type, file_count=count, total_bytes=size)
+            for content_type, count, size in by_content_type
+        ],
+    )
+
 @router.get("/{user_id}", response_model=schemas.User, dependencies=[Depends(get_current_active_superuser)])
 async def read_user_by_id(
     user_id: int,
@@ -88,14 +109,16 @@ async def delete_user(
 ) -> Any:
     """
     Delete a user (Superuser only).
-    Consider implications: what happens to their audio files? Mark inactive instead?
-    For now, we delete the user record. Files remain on disk unless cleaned up separately.
+    Their audio records are deleted together with the user; the files are
+    tombstoned and removed from disk by the reclaim job (no grace period).
     """
     user_to_delete = await crud.user.get(db=db, id=user_id)
     if not user_to_delete:
         raise HTTPException(status_code=404, detail="User not found")
     if user_to_delete.is_superuser:
          raise HTTPException(status_code=403, detail="Superusers cannot be deleted this way")
+    # committed together with the user deletion below
+    await crud.audio_file.remove_all_by_owner(db=db, user_id=user_id, purge_after=datetime.now(timezone.utc))
     deleted_user = await crud.user.remove(db=db, id=user_id)
     if not deleted_user:
          raise HTTPException(status_code=404, detail="User not found during delete attempt")
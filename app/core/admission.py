@@ -0,0 +1,365 @@
+import asyncio
+import fcntl
+import math
+import os
+import pathlib
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import registry
+
+# admission control for uploads. the checks run as ASGI middleware because the
+# multipart body is spooled by FastAPI before any dependency or handler runs.
+#
+# all limits hold across every uvicorn worker on the host; the state lives in
+# files under the lock dir:
+# - per-user concurrency: one flock()ed lock file per slot, so slots are freed if a worker dies
+# - per-user byte rate: a token bucket per user, stored in a file and updated under flock(),
+#   applied to the request body as it is received
+# - global in-flight bytes: each worker records its reservations in its own file, which it
+#   keeps flock()ed while it lives, so the bytes of a worker that died are not counted
+
+ADMITTED = registry.counter("upload_admission_admitted_total", "Uploads admitted by admission control")
+QUEUED = registry.counter("upload_admission_queued_total", "Uploads that had to wait before being admitted or rejected")
+REJECTED = registry.counter("upload_admission_rejected_total", "Uploads rejected by admission control")
+WAITING = registry.gauge("upload_admission_waiting", "Uploads currently waiting for admission")
+IN_FLIGHT = registry.gauge("upload_admission_in_flight", "Uploads currently admitted")
+IN_FLIGHT_BYTES = registry.gauge("upload_admission_in_flight_bytes", "Reserved bytes of uploads admitted by this worker")
+THROTTLED_SECONDS = registry.counter("upload_admission_throttled_seconds_total", "Time uploads spent throttled by the per-user byte rate")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, reason: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@contextmanager
+def _flocked(path: pathlib.Path) -> Iterator[int]:
+    # the critical sections are a few small reads and writes, so blocking the loop is fine
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield fd
+    finally:
+        os.close(fd) # also releases the lock
+
+
+class TokenBucket:
+    """
+    Byte-rate limiter shared by all workers through a file. Consumers may go into
+    debt and sleep it off, which keeps large chunks simple.
+    """
+
+    def __init__(self, path: pathlib.Path, rate: float, capacity: float):
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity
+
+    def _take(self, amount: int) -> float:
+        # wall clock, since the state is shared between processes
+        with _flocked(self.path) as fd:
+            now = time.time()
+            state = os.pread(fd, 64, 0).split()
+            if len(state) == 2:
+                tokens, updated = float(state[0]), float(state[1])
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            else:
+                tokens = self.capacity
+            tokens -= amount
+            os.pwrite(fd, f"{tokens:.3f} {now:.6f}".ljust(64).encode(), 0)
+        return tokens
+
+    async def consume(self, amount: int) -> None:
+        tokens = self._take(amount)
+        if tokens < 0:
+            delay = -tokens / self.rate
+            THROTTLED_SECONDS.inc(delay)
+            await asyncio.sleep(delay)
+
+
+class SharedByteBudget:
+    """In-flight byte budget shared by all workers on the host."""
+
+    def __init__(self, lock_dir: pathlib.Path, budget: int):
+        self.lock_dir = lock_dir
+        self.budget = budget
+        self._lock_path = lock_dir / "inflight.lock"
+        self._own_fd: Optional[int] = None
+        self._own_name = ""
+        self._own_pid: Optional[int] = None
+        self.reserved = 0 # bytes reserved by this worker
+
+    def _ensure_own_file(self) -> None:
+        # called with the budget lock held; the file stays locked until this process exits
+        if self._own_fd is not None and self._own_pid == os.getpid():
+            return
+        self._own_pid = os.getpid()
+        self._own_name = f"inflight-{self._own_pid}.bytes"
+        self._own_fd = os.open(self.lock_dir / self._own_name, os.O_CREAT | os.O_RDWR, 0o644)
+        fcntl.flock(self._own_fd, fcntl.LOCK_EX)
+        self.reserved = 0
+        self._write_own()
+
+    def _write_own(self) -> None:
+        os.pwrite(self._own_fd, f"{self.reserved:20d}".encode(), 0)
+
+    def _others(self) -> int:
+        total = 0
+        for path in self.lock_dir.glob("inflight-*.bytes"):
+            if path.name == self._own_name:
+                continue
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                total += int(os.pread(fd, 20, 0) or b"0") # a live worker
+            else:
+                path.unlink(missing_ok=True) # its worker is gone, and so are its uploads
+            finally:
+                os.close(fd)
+        return total
+
+    def try_reserve(self, nbytes: int) -> bool:
+        with _flocked(self._lock_path):
+            self._ensure_own_file()
+            if self._others() + self.reserved + nbytes > self.budget:
+                return False
+            self.reserved += nbytes
+            self._write_own()
+            return True
+
+    def add(self, nbytes: int) -> None:
+        """Changes this worker's reservation without checking the budget."""
+        with _flocked(self._lock_path):
+            self._ensure_own_file()
+            self.reserved += nbytes
+            self._write_own()
+
+
+@dataclass
+class AdmissionTicket:
+    user_id: int
+    nbytes: int # reserved bytes; grows if a body without Content-Length outgrows its reservation
+    lock_fd: int
+    bucket: Optional[TokenBucket]
+    received: int = 0
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        lock_dir: pathlib.Path,
+        max_concurrent_per_user: int,
+        user_bytes_per_second: int,
+        user_burst_bytes: int,
+        inflight_bytes_budget: int,
+        queue_timeout: float,
+    ):
+        self.lock_dir = lock_dir
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.max_concurrent_per_user = max_concurrent_per_user
+        self.user_bytes_per_second = user_bytes_per_second
+        self.user_burst_bytes = user_burst_bytes
+        self.inflight_bytes_budget = inflight_bytes_budget
+        self.queue_timeout = queue_timeout
+        self._budget = SharedByteBudget(lock_dir, inflight_bytes_budget)
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        lock_dir = settings.UPLOAD_LOCK_DIR or os.path.join(settings.UPLOAD_DIR, ".locks")
+        return cls(
+            lock_dir=pathlib.Path(lock_dir),
+            max_concurrent_per_user=settings.UPLOAD_MAX_CONCURRENT_PER_USER,
+            user_bytes_per_second=settings.UPLOAD_USER_BYTES_PER_SECOND,
+            user_burst_bytes=settings.UPLOAD_USER_BURST_BYTES,
+            inflight_bytes_budget=settings.UPLOAD_GLOBAL_INFLIGHT_BYTES,
+            queue_timeout=settings.UPLOAD_QUEUE_TIMEOUT_SECONDS,
+        )
+
+    def _try_user_slot(self, user_id: int) -> Optional[int]:
+        for slot in range(self.max_concurrent_per_user):
+            fd = os.open(self.lock_dir / f"user-{user_id}-{slot}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            return fd
+        return None
+
+    @staticmethod
+    def _release_user_slot(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _reject(self, status_code: int, detail: str, reason: str, retry_after: Optional[int] = None) -> AdmissionRejected:
+        REJECTED.inc(reason=reason)
+        return AdmissionRejected(status_code, detail, reason, retry_after)
+
+    async def _wait_for_user_slot(self, user_id: int, deadline: float) -> int:
+        loop = asyncio.get_running_loop()
+        delay = 0.05
+        while True:
+            fd = self._try_user_slot(user_id)
+            if fd is not None:
+                return fd
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise self._reject(
+                    429, "Too many concurrent uploads for this user", "user_concurrency",
+                    retry_after=max(1, math.ceil(self.queue_timeout)),
+                )
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+
+    async def _reserve_bytes(self, nbytes: int, deadline: float) -> None:
+        # other workers release bytes too, so this polls the shared budget
+        loop = asyncio.get_running_loop()
+        delay = 0.05
+        while not self._budget.try_reserve(nbytes):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise self._reject(
+                    429, "Server is busy processing other uploads", "global_bytes",
+                    retry_after=max(1, math.ceil(self.queue_timeout)),
+                )
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+        IN_FLIGHT_BYTES.set(self._budget.reserved)
+
+    async def acquire(self, user_id: int, nbytes: int) -> AdmissionTicket:
+        if nbytes > self.inflight_bytes_budget:
+            raise self._reject(413, "Upload is larger than the server's in-flight byte budget", "too_large")
+
+        deadline = asyncio.get_running_loop().time() + self.queue_timeout
+        fd = self._try_user_slot(user_id)
+        queued = fd is None
+        if queued:
+            QUEUED.inc()
+            WAITING.inc()
+        try:
+            if fd is None:
+                fd = await self._wait_for_user_slot(user_id, deadline)
+            if not self._budget.try_reserve(nbytes):
+                if not queued:
+                    queued = True
+                    QUEUED.inc()
+                    WAITING.inc()
+                try:
+                    await self._reserve_bytes(nbytes, deadline)
+                except BaseException:
+                    self._release_user_slot(fd)
+                    raise
+        finally:
+            if queued:
+                WAITING.dec()
+        IN_FLIGHT_BYTES.set(self._budget.reserved)
+
+        bucket = None
+        if self.user_bytes_per_second > 0:
+            bucket = TokenBucket(self.lock_dir / f"bucket-{user_id}", self.user_bytes_per_second, self.user_burst_bytes)
+        ADMITTED.inc()
+        IN_FLIGHT.inc()
+        return AdmissionTicket(user_id=user_id, nbytes=nbytes, lock_fd=fd, bucket=bucket)
+
+    def received(self, ticket: AdmissionTicket, nbytes: int) -> None:
+        """Counts body bytes; a body that outgrows its reservation (no Content-Length) extends it."""
+        ticket.received += nbytes
+        if ticket.received > ticket.nbytes:
+            self._budget.add(ticket.received - ticket.nbytes)
+            ticket.nbytes = ticket.received
+            IN_FLIGHT_BYTES.set(self._budget.reserved)
+
+    async def release(self, ticket: AdmissionTicket) -> None:
+        self._release_user_slot(ticket.lock_fd)
+        self._budget.add(-ticket.nbytes)
+        IN_FLIGHT_BYTES.set(self._budget.reserved)
+        IN_FLIGHT.dec()
+
+
+def _user_id_from_scope(scope: Scope) -> Optional[int]:
+    # only the JWT signature is checked here; the endpoint still does full authentication
+    auth_header = Headers(scope=scope).get("authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    token_data = security.decode_token(auth_header.split(" ", 1)[1])
+    if not token_data or token_data.refresh or not token_data.sub:
+        return None
+    try:
+        return int(token_data.sub)
+    except ValueError:
+        return None
+
+
+class UploadAdmissionMiddleware:
+    """Applies AdmissionController to POST requests on `path`."""
+
+    def __init__(
+        self, app: ASGIApp, path: str, controller: Optional[AdmissionController] = None, default_reservation: Optional[int] = None
+    ):
+        self.app = app
+        self.path = path
+        self.controller = controller or AdmissionController.from_settings()
+        self.default_reservation = (
+            default_reservation if default_reservation is not None else settings.UPLOAD_UNKNOWN_LENGTH_RESERVATION_BYTES
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = _user_id_from_scope(scope)
+        if user_id is None:
+            # reject before the body is read; the endpoint would only do so after spooling it
+            REJECTED.inc(reason="unauthenticated")
+            response = JSONResponse(
+                {"detail": "Could not validate credentials"}, status_code=401, headers={"WWW-Authenticate": "Bearer"}
+            )
+            await response(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit():
+            nbytes = int(content_length)
+        else:
+            nbytes = self.default_reservation # chunked body; the reservation grows if it is exceeded
+
+        try:
+            ticket = await self.controller.acquire(user_id, nbytes)
+        except AdmissionRejected as e:
+            headers = {"Retry-After": str(e.retry_after)} if e.retry_after is not None else None
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        async def throttled_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                if body:
+                    self.controller.received(ticket, len(body))
+                    if ticket.bucket is not None:
+                        await ticket.bucket.consume(len(body))
+            return message
+
+        try:
+            await self.app(scope, throttled_receive, send)
+        finally:
+            await self.controller.release(ticket)
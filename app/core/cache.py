@@ -0,0 +1,173 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# response cache for per-user reads. keys include the user's library version
+# (user_library_stats.version), which every write to the library bumps in the
+# same transaction, so an entry can never be served after the data changed;
+# old versions are simply never asked for again and age out of the LRU.
+#
+# two tiers: a bounded LRU in each worker, and an optional shared tier that all
+# workers can fill for each other. the shared tier is an interface; "local" is an
+# in-process stand-in with the same semantics for development and tests.
+
+REQUESTS = registry.counter("response_cache_requests_total", "Response cache lookups, by tier and result")
+HIT_RATIO = registry.gauge("response_cache_hit_ratio", "Hits over lookups since start, by tier")
+MEMORY = registry.gauge("response_cache_memory_bytes", "Bytes held by cached entries (keys and values), by tier")
+ENTRIES = registry.gauge("response_cache_entries", "Cached entries, by tier")
+EVICTIONS = registry.counter("response_cache_evictions_total", "Entries evicted to stay within the size limit, by tier")
+
+
+class _Stats:
+    def __init__(self, tier: str):
+        self.tier = tier
+        self.hits = 0
+        self.lookups = 0
+
+    def record(self, hit: bool) -> None:
+        self.lookups += 1
+        self.hits += hit
+        REQUESTS.inc(tier=self.tier, result="hit" if hit else "miss")
+        HIT_RATIO.set(self.hits / self.lookups, tier=self.tier)
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by the total size of keys and values in bytes."""
+
+    def __init__(self, max_bytes: int, tier: str = "local"):
+        self.max_bytes = max_bytes
+        self.tier = tier
+        self._data: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = _Stats(tier)
+
+    @staticmethod
+    def _size(key: str, value: bytes) -> int:
+        return len(key) + len(value)
+
+    def _drop(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self._bytes -= self._size(key, value)
+
+    def _report(self) -> None:
+        MEMORY.set(self._bytes, tier=self.tier)
+        ENTRIES.set(len(self._data), tier=self.tier)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] is not None and item[1] <= time.monotonic():
+                self._drop(key)
+                self._report()
+                item = None
+            if item is not None:
+                self._data.move_to_end(key)
+            self.stats.record(item is not None)
+            return item[0] if item is not None else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, expires)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                EVICTIONS.inc(tier=self.tier)
+            self._report()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self._report()
+
+
+class SharedCache:
+    """Interface of the shared tier (e.g. Redis or memcached). Errors should be handled as misses."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        raise NotImplementedError
+
+
+class LocalSharedCache(SharedCache):
+    """In-process stand-in for a shared cache server, with TTLs like the real thing."""
+
+    def __init__(self, max_bytes: int):
+        self._lru = LRUCache(max_bytes, tier="shared")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._lru.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._lru.set(key, value, ttl)
+
+
+def _shared_from_settings() -> Optional[SharedCache]:
+    backend = settings.RESPONSE_CACHE_SHARED_BACKEND
+    if not backend:
+        return None
+    if backend == "local":
+        return LocalSharedCache(settings.RESPONSE_CACHE_MAX_BYTES)
+    raise ValueError(f"Unknown RESPONSE_CACHE_SHARED_BACKEND: {backend}")
+
+
+class ResponseCache:
+    def __init__(self, local: LRUCache, shared: Optional[SharedCache], *, max_entry_bytes: int, shared_ttl: int):
+        self.local = local
+        self.shared = shared
+        self.max_entry_bytes = max_entry_bytes
+        self.shared_ttl = shared_ttl
+
+    @classmethod
+    def from_settings(cls) -> "ResponseCache":
+        return cls(
+            LRUCache(settings.RESPONSE_CACHE_MAX_BYTES),
+            _shared_from_settings(),
+            max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+            shared_ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+
+    @staticmethod
+    def key(user_id: int, version: int, name: str, params: Dict[str, Any]) -> str:
+        return f"{name}:{user_id}:{version}:{json.dumps(params, sort_keys=True, default=str, separators=(',', ':'))}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        try:
+            value = await self.shared.get(key)
+        except (OSError, asyncio.TimeoutError) as e:
+            print(f"Shared cache get failed: {e}")
+            return None
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_entry_bytes:
+            return
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, self.shared_ttl)
+            except (OSError, asyncio.TimeoutError) as e:
+                print(f"Shared cache set failed: {e}")
+
+
+response_cache = ResponseCache.from_settings()
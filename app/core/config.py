@@ -19,6 +19,14 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     ALGORITHM: str = "HS256"
 
+    # Signed download URLs (format compatible with nginx secure_link_hmac)
+    SIGNED_URL_SECRET: str | None = None # defaults to SECRET_KEY; share with the proxy, not the JWT key
+    SIGNED_URL_EXPIRE_SECONDS: int = 300
+    SIGNED_URL_MAX_EXPIRE_SECONDS: int = 3600
+
+    # Batch metadata lookup (POST /audio/lookup)
+    AUDIO_LOOKUP_MAX_IDS: int = 500
+
     # Yandex OAuth
     YANDEX_CLIENT_ID: str
     YANDEX_CLIENT_SECRET: str
@@ -30,6 +38,71 @@ class Settings(BaseSettings):
 
     # File Uploads
     UPLOAD_DIR: str = "uploads"
+    # fan-out below <UPLOAD_DIR>/<user_id>/, e.g. depth 2 width 2 -> ab/cd/<uuid>.<ext>; depth 0 is the flat layout
+    STORAGE_FANOUT_DEPTH: int = 2
+    STORAGE_FANOUT_WIDTH: int = 2
+
+    # Integrity scrubber (python -m app.jobs.scrub)
+    SCRUB_WORKERS: int = 4 # hashing threads
+    SCRUB_MAX_BYTES_PER_SECOND: int = 200 * 1024 * 1024 # 0 disables the bandwidth limit
+    SCRUB_MAX_IOPS: int = 400 # read calls per second, 0 disables the limit
+    SCRUB_READ_SIZE: int = 4 * 1024 * 1024 # bytes per read call
+    SCRUB_BATCH_SIZE: int = 200 # rows per checkpoint
+
+    # Acoustic fingerprinting (python -m app.jobs.fingerprint)
+    FFMPEG_BINARY: str = "ffmpeg" # used to decode non-WAV formats
+    FINGERPRINT_PEAKS_PER_SECOND: int = 5 # spectral peaks kept per second of audio
+    FINGERPRINT_MIN_MATCHES: int = 15 # aligned hash matches needed to report a duplicate
+    FINGERPRINT_WORKERS: int = 2 # decoding/STFT processes
+    FINGERPRINT_CLAIM_TIMEOUT_SECONDS: int = 3600 # a file still 'processing' after this is taken over by another worker
+
+    # Deferred file removal (python -m app.jobs.reclaim_storage)
+    STORAGE_DELETE_GRACE_SECONDS: int = 24 * 60 * 60 # deleted files can be restored until then
+    RECLAIM_BATCH_SIZE: int = 100 # tombstones claimed per transaction
+    RECLAIM_WORKERS: int = 4 # threads doing unlink() calls
+    RECLAIM_RETRY_SECONDS: int = 60 # first retry delay after a failed removal, doubled per attempt
+    RECLAIM_MAX_RETRY_SECONDS: int = 6 * 60 * 60
+
+    # Event loop lag monitor (app/core/loopmonitor.py)
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.25 # heartbeat period
+    LOOP_MONITOR_THRESHOLD_SECONDS: float = 0.1 # a heartbeat this late counts as the loop being blocked
+    LOOP_MONITOR_SAMPLE_RATE: float = 0.1 # fraction of stalls for which a stack sample is taken and logged
+
+    # Response cache for library reads (app/core/cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024 # per worker
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024 # larger responses are not cached
+    RESPONSE_CACHE_SHARED_BACKEND: str = "" # "" (disabled) or "local" (in-process stand-in)
+    RESPONSE_CACHE_TTL_SECONDS: int = 10 * 60 # shared tier only; entries never go stale, this just frees memory
+
+    # Request tracing (app/core/tracing.py)
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 0.01 # fraction of requests traced and given a Server-Timing header
+    TRACING_TRUSTED_PROXIES: str = "" # comma-separated client IPs whose traceparent sampled flag is followed as is
+    TRACING_EXPORTER: str = "" # "" (Server-Timing only), "otlp" (OTLP/HTTP JSON) or "memory" (tests)
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SERVICE_NAME: str = "fastapi-audio-upload"
+
+    # Server-sent events (GET /audio/events)
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0 # comment line sent on idle streams to keep proxies from closing them
+    EVENTS_QUEUE_SIZE: int = 100 # undelivered events per stream before it is closed
+    EVENTS_MAX_STREAM_SECONDS: float = 300.0 # streams are closed after this and the client reconnects
+
+    # Idempotency-Key handling
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 60 * 60 # how long a stored result is replayed
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: float = 30.0 # how long a retry waits for the in-flight request
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 10 * 60 # an in-progress key older than this is considered abandoned
+
+    # Upload admission control
+    UPLOAD_ADMISSION_ENABLED: bool = True
+    UPLOAD_MAX_CONCURRENT_PER_USER: int = 4 # enforced across all workers via lock files
+    UPLOAD_USER_BYTES_PER_SECOND: int = 20 * 1024 * 1024 # token bucket refill rate per user, across all workers; 0 disables
+    UPLOAD_USER_BURST_BYTES: int = 8 * 1024 * 1024 # token bucket capacity
+    UPLOAD_GLOBAL_INFLIGHT_BYTES: int = 1024 * 1024 * 1024 # shared by all workers on the host
+    UPLOAD_UNKNOWN_LENGTH_RESERVATION_BYTES: int = 64 * 1024 * 1024 # reserved for uploads without Content-Length
+    UPLOAD_QUEUE_TIMEOUT_SECONDS: float = 5.0 # how long a request may wait before 429
+    UPLOAD_LOCK_DIR: str | None = None # defaults to <UPLOAD_DIR>/.locks
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,144 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# per-user event stream. events are published with pg_notify, so they are sent
+# when the publishing transaction commits and reach every worker; each worker
+# holds one LISTEN connection and fans events out to its local subscribers.
+
+CHANNEL = "audio_events"
+
+SUBSCRIBERS = registry.gauge("events_subscribers", "Open event streams in this worker")
+DELIVERED = registry.counter("events_delivered_total", "Events queued to local subscribers")
+DROPPED = registry.counter("events_dropped_total", "Event streams closed because the client did not keep up")
+LISTENER_RECONNECTS = registry.counter("events_listener_reconnects_total", "Times the LISTEN connection was re-established")
+
+
+@dataclass
+class Event:
+    type: str
+    data: Dict[str, Any]
+
+
+@dataclass(eq=False)
+class Subscription:
+    user_id: int
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE))
+    overflowed: bool = False
+
+
+def _notify_statement(user_id: int, event_type: str, data: Dict[str, Any]):
+    payload = json.dumps({"user_id": user_id, "type": event_type, "data": data}, default=str)
+    return select(func.pg_notify(CHANNEL, payload))
+
+
+async def publish(db: AsyncSession, *, user_id: int, event_type: str, data: Dict[str, Any]) -> None:
+    """Queues an event in the current transaction; it is delivered when the caller commits."""
+    await db.execute(_notify_statement(user_id, event_type, data))
+
+
+class EventBroker:
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "EventBroker":
+        url = make_url(settings.DATABASE_URI).set(drivername="postgresql")
+        return cls(url.render_as_string(hide_password=False))
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        # end open streams so shutdown doesn't wait for clients to disconnect
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                self._close(subscription)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id=user_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+        SUBSCRIBERS.dec()
+
+    def _close(self, subscription: Subscription) -> None:
+        # None tells the stream to end; make room for it if the queue is full
+        while subscription.queue.full():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        self.unsubscribe(subscription)
+
+    def dispatch(self, user_id: int, event: Event) -> None:
+        for subscription in list(self._subscriptions.get(user_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+                DELIVERED.inc()
+            except asyncio.QueueFull:
+                # a stream that can't keep up is closed; the client reconnects and re-reads its state
+                subscription.overflowed = True
+                DROPPED.inc()
+                self._close(subscription)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            self.dispatch(int(message["user_id"]), Event(type=message["type"], data=message.get("data") or {}))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring malformed event payload: {e}")
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        first = True
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                if not first:
+                    LISTENER_RECONNECTS.inc()
+                first = False
+                delay = 1.0
+                await lost.wait()
+                print("Event listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Event listener error: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+broker = EventBroker.from_settings()
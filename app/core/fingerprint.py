@@ -0,0 +1,140 @@
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.core.config import settings
+
+# landmark fingerprints: peaks of the log spectrogram are paired with the next
+# few peaks in time and each pair (f1, f2, dt) becomes a hash anchored at t1.
+# the same recording re-encoded in another format yields mostly the same hashes
+# at the same relative offsets, which is what duplicate matching looks for.
+
+SAMPLE_RATE = 11025
+N_FFT = 1024 # 513 frequency bins, fits in 10 bits
+HOP = 512
+NEIGHBORHOOD_FRAMES = 10 # peak must be the maximum within +-frames ...
+NEIGHBORHOOD_BINS = 10 # ... and +-bins
+FAN_OUT = 3 # pairs per anchor peak
+MAX_DT = 63 # frames, fits in 6 bits
+BLOCK_FRAMES = 2048 # STFT block size, bounds memory for long tracks
+
+_WINDOW = np.hanning(N_FFT).astype(np.float32)
+
+
+class FingerprintError(Exception):
+    pass
+
+
+@dataclass
+class Fingerprint:
+    duration: float # seconds
+    hashes: np.ndarray # int32
+    offsets: np.ndarray # int32, frame index of the anchor peak
+
+
+def _read_wav(path: str) -> np.ndarray:
+    # stdlib fallback when ffmpeg is not installed
+    try:
+        with wave.open(path, "rb") as w:
+            channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+            raw = w.readframes(w.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise FingerprintError(f"cannot decode without ffmpeg: {e!r}")
+    if width not in (1, 2, 4):
+        raise FingerprintError(f"unsupported WAV sample width: {width}")
+    # a truncated file can end in the middle of a frame; frombuffer/reshape reject that
+    raw = raw[:len(raw) - len(raw) % (width * channels)]
+    try:
+        if width == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+        else:
+            dtype = np.int16 if width == 2 else np.int32
+            samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    except ValueError as e:
+        raise FingerprintError(f"cannot decode WAV data: {e}")
+    if rate != SAMPLE_RATE and len(samples):
+        target = np.arange(0, len(samples) / rate, 1 / SAMPLE_RATE)
+        samples = np.interp(target, np.arange(len(samples)) / rate, samples).astype(np.float32)
+    return samples
+
+
+def decode_pcm(path: str) -> np.ndarray:
+    """Decodes any supported audio file to mono float32 PCM at SAMPLE_RATE."""
+    ffmpeg = shutil.which(settings.FFMPEG_BINARY)
+    if ffmpeg is None:
+        return _read_wav(path)
+    proc = subprocess.run(
+        [ffmpeg, "-v", "error", "-nostdin", "-i", path, "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "f32le", "-"],
+        capture_output=True,
+    )
+    if proc.returncode != 0:
+        raise FingerprintError(proc.stderr.decode(errors="replace").strip()[:500])
+    return np.frombuffer(proc.stdout, dtype="<f4")
+
+
+def log_spectrogram(samples: np.ndarray) -> np.ndarray:
+    """Magnitude STFT in log scale, shape (frames, N_FFT // 2 + 1)."""
+    if len(samples) < N_FFT:
+        return np.empty((0, N_FFT // 2 + 1), dtype=np.float32)
+    frames = sliding_window_view(samples, N_FFT)[::HOP] # no copy
+    blocks = [
+        np.abs(np.fft.rfft(frames[i:i + BLOCK_FRAMES] * _WINDOW, axis=1)).astype(np.float32)
+        for i in range(0, len(frames), BLOCK_FRAMES)
+    ]
+    return np.log1p(np.concatenate(blocks))
+
+
+def _max_filter(spec: np.ndarray) -> np.ndarray:
+    # a rectangular max filter is separable: frequency axis first, then time
+    padded = np.pad(spec, ((0, 0), (NEIGHBORHOOD_BINS, NEIGHBORHOOD_BINS)), constant_values=-np.inf)
+    out = sliding_window_view(padded, 2 * NEIGHBORHOOD_BINS + 1, axis=1).max(axis=-1)
+    padded = np.pad(out, ((NEIGHBORHOOD_FRAMES, NEIGHBORHOOD_FRAMES), (0, 0)), constant_values=-np.inf)
+    return sliding_window_view(padded, 2 * NEIGHBORHOOD_FRAMES + 1, axis=0).max(axis=-1)
+
+
+def find_peaks(spec: np.ndarray, max_peaks: int) -> tuple[np.ndarray, np.ndarray]:
+    """Local maxima above the mean level, strongest `max_peaks` kept, sorted by time."""
+    if spec.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    is_peak = (spec == _max_filter(spec)) & (spec > spec.mean())
+    t, f = np.nonzero(is_peak)
+    if len(t) > max_peaks:
+        strongest = np.argpartition(-spec[t, f], max_peaks - 1)[:max_peaks]
+        t, f = t[strongest], f[strongest]
+    order = np.lexsort((f, t))
+    return t[order], f[order]
+
+
+def peak_hashes(t: np.ndarray, f: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pairs each peak with the next FAN_OUT peaks: hash = f1(10 bits) | f2(10 bits) | dt(6 bits)."""
+    hashes, offsets = [], []
+    for k in range(1, FAN_OUT + 1):
+        if len(t) <= k:
+            break
+        dt = t[k:] - t[:-k]
+        ok = (dt > 0) & (dt <= MAX_DT)
+        hashes.append((f[:-k][ok] << 16) | (f[k:][ok] << 6) | dt[ok])
+        offsets.append(t[:-k][ok])
+    if not hashes:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    # drop repeated (hash, offset) pairs
+    keys = np.unique((np.concatenate(hashes) << 32) | np.concatenate(offsets))
+    return (keys >> 32).astype(np.int32), (keys & 0xFFFFFFFF).astype(np.int32)
+
+
+def fingerprint_samples(samples: np.ndarray) -> Fingerprint:
+    duration = len(samples) / SAMPLE_RATE
+    spec = log_spectrogram(samples)
+    t, f = find_peaks(spec, max_peaks=max(1, int(duration * settings.FINGERPRINT_PEAKS_PER_SECOND)))
+    hashes, offsets = peak_hashes(t, f)
+    return Fingerprint(duration=duration, hashes=hashes, offsets=offsets)
+
+
+def fingerprint_file(path: str) -> Fingerprint:
+    """CPU-bound; run it in a process pool, never on the event loop."""
+    return fingerprint_samples(decode_pcm(path))
@@ -0,0 +1,127 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import idempotency_key as crud_idempotency
+from app.models.idempotency import IdempotencyKey
+
+# Idempotency-Key support: the first request with a key claims it by inserting an
+# in-progress row; retries wait for that row to complete and replay the stored response.
+
+# keys owned by requests in this worker; local retries wait on the event instead of polling the DB
+_local_owners: Dict[Tuple[int, str], asyncio.Event] = {}
+
+
+@dataclass
+class IdempotencyClaim:
+    user_id: Optional[int] = None
+    key: Optional[str] = None
+    record_id: Optional[int] = None # set when this request owns the key and must do the work
+    replay: Optional[Response] = None # set when a stored response should be returned instead
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    headers = {"Idempotent-Replayed": "true"}
+    if record.response_body is None:
+        return Response(status_code=record.response_status, headers=headers)
+    return JSONResponse(json.loads(record.response_body), status_code=record.response_status, headers=headers)
+
+
+def _wake(claim: IdempotencyClaim) -> None:
+    event = _local_owners.pop((claim.user_id, claim.key), None)
+    if event is not None:
+        event.set()
+
+
+async def begin(db: AsyncSession, *, user_id: int, key: Optional[str], request_hash: str) -> IdempotencyClaim:
+    """
+    Claims `key` for this request, or waits for the request that holds it.
+    Without a key this is a no-op claim and the caller just does the work.
+    """
+    if key is None:
+        return IdempotencyClaim()
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS
+    delay = 0.05
+    while True:
+        now = datetime.now(timezone.utc)
+        record_id = await crud_idempotency.try_create(
+            db, user_id=user_id, key=key, request_hash=request_hash,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+        )
+        if record_id is not None:
+            _local_owners[(user_id, key)] = asyncio.Event()
+            return IdempotencyClaim(user_id=user_id, key=key, record_id=record_id)
+
+        record = await crud_idempotency.get_by_key(db, user_id=user_id, key=key)
+        if record is None:
+            continue # released in the meantime, try to claim it again
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if record.expires_at <= now:
+            await crud_idempotency.remove_if(db, id=record.id)
+            continue
+        if record.status == "completed":
+            return IdempotencyClaim(user_id=user_id, key=key, replay=_replay(record))
+        stale_before = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+        if record.created_at < stale_before:
+            # the owner died without completing or releasing the key
+            await crud_idempotency.remove_if(db, id=record.id, status="in_progress", created_before=stale_before)
+            continue
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"},
+            )
+        event = _local_owners.get((user_id, key))
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+
+
+async def complete(db: AsyncSession, claim: IdempotencyClaim, *, status_code: int, body: Any = None) -> None:
+    """
+    Stores the response for replay and commits it in the caller's transaction, so the
+    work and the completed key are saved together (or not at all). Then releases waiters.
+    Without a key this just commits.
+    """
+    if claim.record_id is None:
+        await db.commit()
+        return
+    response_body = json.dumps(jsonable_encoder(body)) if body is not None else None
+    await crud_idempotency.complete(db, id=claim.record_id, response_status=status_code, response_body=response_body)
+    await db.commit()
+    _wake(claim)
+
+
+async def abandon(db: AsyncSession, claim: IdempotencyClaim) -> None:
+    """Releases the key after a failed attempt so that a retry can do the work again."""
+    if claim.record_id is None:
+        return
+    try:
+        await db.rollback()
+        await crud_idempotency.remove_if(db, id=claim.record_id, status="in_progress")
+    except Exception as e:
+        print(f"Error releasing idempotency key {claim.key}: {e}") # it expires via IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+    finally:
+        _wake(claim)
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# event loop lag monitor. a heartbeat task wakes every `interval` seconds and
+# measures how late it was; a watchdog thread notices when the heartbeat stops
+# and takes a stack sample of the loop thread while it is still blocked, which
+# points at the call that holds the loop (an unlink() on a slow disk, say).
+
+LAG = registry.gauge("event_loop_lag_seconds", "Lateness of the last loop monitor heartbeat")
+LAG_TOTAL = registry.counter("event_loop_lag_seconds_total", "Accumulated loop monitor heartbeat lateness")
+STALLS = registry.counter("event_loop_stalls_total", "Heartbeats delayed by more than the blocking threshold")
+BLOCKING_SAMPLES = registry.counter("event_loop_blocking_samples_total", "Stack samples taken of a blocked event loop, by call site")
+BLOCKING_SECONDS = registry.counter("event_loop_blocking_seconds_total", "Duration of sampled event loop stalls, by call site")
+
+STACK_LIMIT = 30
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # .../app
+_PROJECT_DIR = os.path.dirname(_APP_DIR)
+
+
+def _callback_frames(stack: traceback.StackSummary) -> traceback.StackSummary:
+    # drop the event loop machinery above the callback that is running
+    for i in range(len(stack) - 1, -1, -1):
+        if stack[i].name == "_run" and stack[i].filename.endswith(os.path.join("asyncio", "events.py")):
+            return traceback.StackSummary.from_list(stack[i + 1:])
+    return stack
+
+
+def _call_site(stack: traceback.StackSummary) -> str:
+    # innermost frame in our own code, so stalls inside libraries are charged to the caller
+    for frame in reversed(stack):
+        if frame.filename.startswith(_APP_DIR) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, _PROJECT_DIR)}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class LoopMonitor:
+    def __init__(self, *, interval: float, threshold: float, sample_rate: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._beats = 0
+        self._checked_beat = -1 # heartbeat for which a sampling decision was made
+        self._sample: Optional[Tuple[str, str]] = None # (site, formatted stack), handed from the watchdog to the heartbeat
+
+    @classmethod
+    def from_settings(cls) -> "LoopMonitor":
+        return cls(
+            interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+            threshold=settings.LOOP_MONITOR_THRESHOLD_SECONDS,
+            sample_rate=settings.LOOP_MONITOR_SAMPLE_RATE,
+        )
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._stop.set()
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_beat = time.monotonic()
+            self._beats += 1
+            LAG.set(lag)
+            LAG_TOTAL.inc(lag)
+            if lag < self.threshold:
+                continue
+            STALLS.inc()
+            sample, self._sample = self._sample, None
+            if sample is not None:
+                site, stack = sample
+                BLOCKING_SAMPLES.inc(site=site)
+                BLOCKING_SECONDS.inc(lag, site=site)
+                print(f"Event loop blocked for {lag * 1000:.0f} ms at {site}\n{stack}")
+
+    def _watchdog(self) -> None:
+        check_every = max(0.01, self.threshold / 2)
+        while not self._stop.wait(check_every):
+            beat = self._beats
+            if beat == self._checked_beat or time.monotonic() - self._last_beat < self.interval + self.threshold:
+                continue
+            # the loop is stuck right now; decide once per stall whether to sample it
+            self._checked_beat = beat
+            if random.random() >= self.sample_rate:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = _callback_frames(traceback.extract_stack(frame, limit=STACK_LIMIT))
+            del frame
+            self._sample = (_call_site(stack), "".join(stack.format()))
+
+
+monitor = LoopMonitor.from_settings()
@@ -1,3 +1,7 @@
+import base64
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Union, Optional
 
@@ -48,4 +52,27 @@ def decode_token(token: str) -> Optional[TokenPayload]:
             )
         return token_data
     except JWTError:
-        return None # token is invalid or expired
\ No newline at end of file
+        return None # token is invalid or expired
+
+# --- signed file URLs ---
+# message: "<uri>|<issued at>|<lifetime seconds>|<byte range or empty>", HMAC-SHA256, base64url without padding.
+# nginx (ngx_http_secure_link_hmac_module) can verify the same token with:
+#   secure_link_hmac "$arg_st,$arg_ts,$arg_e";
+#   secure_link_hmac_message "$uri|$arg_ts|$arg_e|$arg_r";
+#   secure_link_hmac_secret <SIGNED_URL_SECRET>;
+#   secure_link_hmac_algorithm sha256;
+
+def _signed_url_secret() -> bytes:
+    return (settings.SIGNED_URL_SECRET or settings.SECRET_KEY).encode()
+
+def sign_file_uri(uri: str, issued_at: int, lifetime: int, byte_range: str = "") -> str:
+    message = f"{uri}|{issued_at}|{lifetime}|{byte_range}".encode()
+    digest = hmac.new(_signed_url_secret(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+def verify_file_signature(uri: str, token: str, issued_at: int, lifetime: int, byte_range: str = "") -> bool:
+    now = int(time.time())
+    if issued_at > now + 60 or now > issued_at + lifetime: # allow a little clock skew
+        return False
+    expected = sign_file_uri(uri, issued_at, lifetime, byte_range)
+    return hmac.compare_digest(expected, token)
@@ -0,0 +1,20 @@
+import pathlib
+
+from app.core.config import settings
+
+UPLOAD_DIR = pathlib.Path(settings.UPLOAD_DIR)
+
+def relative_path_for(user_id: int, stored_filename: str) -> pathlib.PurePosixPath:
+    """
+    Relative storage path for a new file: <user_id>/<fan-out dirs>/<stored_filename>.
+    The fan-out directories are taken from the start of the (uuid) stored filename,
+    which keeps every directory small even for very large libraries.
+    """
+    key = stored_filename.replace("-", "")
+    width = settings.STORAGE_FANOUT_WIDTH
+    shards = [key[level * width:(level + 1) * width] for level in range(settings.STORAGE_FANOUT_DEPTH)]
+    return pathlib.PurePosixPath(str(user_id), *shards, stored_filename)
+
+def full_path(relative_path: str | pathlib.PurePath) -> pathlib.Path:
+    """Absolute path on disk for a path stored in AudioFile.file_path."""
+    return UPLOAD_DIR / relative_path
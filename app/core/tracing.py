@@ -0,0 +1,406 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# per-request tracing. a sampled request gets a Trace in a context variable;
+# spans are recorded around auth, DB queries (SQLAlchemy cursor events), disk
+# writes and response serialization. the totals per phase are returned in a
+# Server-Timing header, and the spans are handed to a span processor that
+# exports them as OTLP/JSON (the OpenTelemetry wire format) to an exporter.
+
+# phases summed into Server-Timing, in header order
+SERVER_TIMING_PHASES = ("auth", "db", "disk", "serialize")
+
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+STATUS_CODE_ERROR = 2
+
+DROPPED_SPANS = registry.counter("tracing_dropped_spans_total", "Spans dropped because the export queue was full")
+EXPORT_ERRORS = registry.counter("tracing_export_errors_total", "Failed span export batches")
+
+_SHUTDOWN = object()
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str # 32 hex digits
+    span_id: str # 16 hex digits
+    parent_span_id: Optional[str]
+    start_ns: int # unix time
+    end_ns: Optional[int] = None
+    kind: int = SPAN_KIND_INTERNAL
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: bool = False
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+@dataclass
+class Trace:
+    root: Span
+    spans: List[Span] = field(default_factory=list)
+    handler_end_ns: Optional[int] = None # when the endpoint function returned
+
+    def server_timing(self) -> str:
+        totals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        for span in self.spans:
+            if span.name in SERVER_TIMING_PHASES and span.end_ns is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+                counts[span.name] = counts.get(span.name, 0) + 1
+        entries = []
+        for name in SERVER_TIMING_PHASES:
+            if name in totals:
+                entry = f"{name};dur={totals[name]:.2f}"
+                if counts[name] > 1:
+                    entry += f';desc="{counts[name]} spans"'
+                entries.append(entry)
+        entries.append(f"total;dur={self.root.duration_ms:.2f}")
+        return ", ".join(entries)
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_parent: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("parent_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def _start(trace: Trace, name: str, kind: int, attributes: Dict[str, Any], start_ns: Optional[int] = None) -> Span:
+    parent = _parent.get() or trace.root
+    span = Span(
+        name=name, trace_id=trace.root.trace_id, span_id=_new_id(8), parent_span_id=parent.span_id,
+        start_ns=start_ns or time.time_ns(), kind=kind, attributes=attributes,
+    )
+    trace.spans.append(span)
+    return span
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Records a span around the block when the current request is traced; otherwise a no-op."""
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    current = _start(trace, name, SPAN_KIND_INTERNAL, attributes)
+    token = _parent.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _parent.reset(token)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, kind: int = SPAN_KIND_INTERNAL, **attributes) -> None:
+    """Adds an already measured span to the current trace, if any."""
+    trace = _trace.get()
+    if trace is not None:
+        _start(trace, name, kind, attributes, start_ns=start_ns).end_ns = end_ns
+
+
+# --- database ---
+
+def instrument_engine(engine) -> None:
+    """Records a 'db' span for every statement executed by `engine` (an AsyncEngine or Engine)."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _trace.get() is not None:
+            conn.info.setdefault("trace_query_start", []).append(time.time_ns())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("trace_query_start")
+        if starts:
+            record_span(
+                "db", starts.pop(), time.time_ns(), kind=SPAN_KIND_CLIENT,
+                **{"db.system": "postgresql", "db.statement": statement[:500]},
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        starts = exception_context.connection.info.get("trace_query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+
+# --- export ---
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp_json(spans: List[Span]) -> Dict[str, Any]:
+    """An OTLP/JSON ExportTraceServiceRequest for `spans`."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": _otlp_value(settings.TRACING_SERVICE_NAME)}]},
+        "scopeSpans": [{
+            "scope": {"name": "app.core.tracing"},
+            "spans": [
+                {
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_span_id or "",
+                    "name": s.name,
+                    "kind": s.kind,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns or s.start_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": STATUS_CODE_ERROR} if s.error else {},
+                }
+                for s in spans
+            ],
+        }],
+    }]}
+
+
+class SpanExporter:
+    """Receives finished spans. export() is called from the span processor, never on the event loop for batches."""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps exported spans in memory, for tests."""
+
+    def __init__(self):
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class OTLPHttpJsonExporter(SpanExporter):
+    """Posts spans to an OTLP/HTTP collector endpoint (e.g. http://collector:4318/v1/traces) as JSON."""
+
+    def __init__(self, endpoint: str, timeout: float = 10.0):
+        import httpx
+        self.endpoint = endpoint
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Span]) -> None:
+        response = self._client.post(
+            self.endpoint, content=json.dumps(to_otlp_json(spans)), headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class SimpleSpanProcessor:
+    """Exports each finished trace synchronously. Only suitable for in-memory exporters."""
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+
+    def on_end(self, spans: List[Span]) -> None:
+        self.exporter.export(spans)
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them in batches from a background thread."""
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int = 2048, max_batch_size: int = 512, schedule_delay: float = 5.0):
+        self.exporter = exporter
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay
+        self._queue: "queue.Queue[Any]" = queue.Queue(max_queue_size)
+        self._thread = threading.Thread(target=self._worker, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, spans: List[Span]) -> None:
+        for s in spans:
+            try:
+                self._queue.put_nowait(s)
+            except queue.Full:
+                DROPPED_SPANS.inc()
+
+    def _export(self, batch: List[Span]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            EXPORT_ERRORS.inc()
+            print(f"Span export failed: {e}")
+
+    def _worker(self) -> None:
+        batch: List[Span] = []
+        flush_at = time.monotonic() + self.schedule_delay
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, flush_at - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _SHUTDOWN:
+                if batch:
+                    self._export(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.max_batch_size or time.monotonic() >= flush_at:
+                if batch:
+                    self._export(batch)
+                batch = []
+                flush_at = time.monotonic() + self.schedule_delay
+
+    def shutdown(self) -> None:
+        self._queue.put(_SHUTDOWN)
+        self._thread.join(timeout=self.schedule_delay + 5)
+        self.exporter.shutdown()
+
+
+def processor_from_settings():
+    exporter = settings.TRACING_EXPORTER
+    if not exporter:
+        return None
+    if exporter == "memory":
+        return SimpleSpanProcessor(InMemorySpanExporter())
+    if exporter == "otlp":
+        return BatchSpanProcessor(OTLPHttpJsonExporter(settings.TRACING_OTLP_ENDPOINT))
+    raise ValueError(f"Unknown TRACING_EXPORTER: {exporter}")
+
+
+# --- request instrumentation ---
+
+class TracingMiddleware:
+    """Starts a trace for sampled HTTP requests and adds the Server-Timing header."""
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.01, processor=None, trusted_proxies: Iterable[str] = ()):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.processor = processor
+        self.trusted_proxies = frozenset(trusted_proxies)
+
+    def _sampled(self, scope: Scope) -> tuple:
+        # continue a W3C traceparent from the caller. its sampled flag is followed as is only
+        # from trusted proxies; from anyone else it can turn sampling off but not force it on
+        rate_sampled = random.random() < self.sample_rate
+        match = _TRACEPARENT.match(Headers(scope=scope).get("traceparent", ""))
+        if not match:
+            return rate_sampled, _new_id(16), None
+        trace_id, parent_id, flags = match.groups()
+        parent_sampled = int(flags, 16) & 1 == 1
+        client = scope.get("client")
+        if client is not None and client[0] in self.trusted_proxies:
+            return parent_sampled, trace_id, parent_id
+        return parent_sampled and rate_sampled, trace_id, parent_id
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sampled, trace_id, parent_id = self._sampled(scope)
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(
+            name=f"{scope['method']} {scope['path']}", trace_id=trace_id, span_id=_new_id(8),
+            parent_span_id=parent_id, start_ns=time.time_ns(), kind=SPAN_KIND_SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+        )
+        trace = Trace(root=root)
+        token = _trace.set(trace)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if trace.handler_end_ns is not None:
+                    # FastAPI validates and serializes the return value after the endpoint returns
+                    record_span("serialize", trace.handler_end_ns, time.time_ns())
+                root.attributes["http.response.status_code"] = message["status"]
+                root.error = message["status"] >= 500
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except BaseException:
+            root.error = True
+            raise
+        finally:
+            _trace.reset(token)
+            root.end_ns = time.time_ns()
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                root.attributes["http.route"] = route.path
+                root.name = f"{scope['method']} {route.path}"
+            if self.processor is not None:
+                self.processor.on_end([root] + trace.spans)
+
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        trace = _trace.get()
+        try:
+            with span("handler"):
+                return await endpoint(*args, **kwargs)
+        finally:
+            if trace is not None:
+                trace.handler_end_ns = time.time_ns()
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that records the endpoint function as a 'handler' span, so serialization can be told apart."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
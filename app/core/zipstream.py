@@ -0,0 +1,78 @@
+import asyncio
+import io
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import aiofiles
+
+# content types that are already compressed; deflating them only burns CPU
+PRECOMPRESSED_CONTENT_TYPES = {"audio/mpeg", "audio/ogg", "audio/aac", "audio/flac"}
+
+READ_CHUNK_SIZE = 1024 * 1024 # 1MB
+
+
+@dataclass
+class ZipEntry:
+    name: str # path inside the archive
+    path: str # absolute path on disk
+    modified: datetime
+    size: Optional[int] = None
+    content_type: Optional[str] = None
+
+
+class _UnseekableSink(io.RawIOBase):
+    """Collects what ZipFile writes so it can be yielded; being unseekable makes ZipFile emit data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(entries: AsyncIterator[ZipEntry]) -> AsyncIterator[bytes]:
+    """
+    Yields a ZIP archive built from `entries` chunk by chunk, holding at most one
+    read chunk in memory. Entries whose file is missing on disk are skipped.
+    """
+    sink = _UnseekableSink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+        async for entry in entries:
+            try:
+                source = await aiofiles.open(entry.path, "rb")
+            except FileNotFoundError:
+                print(f"Skipping missing file in export: {entry.path}")
+                continue
+
+            info = zipfile.ZipInfo(entry.name, date_time=entry.modified.timetuple()[:6])
+            stored = entry.content_type in PRECOMPRESSED_CONTENT_TYPES
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            # a known size lets zipfile skip the zip64 extra field for small entries
+            force_zip64 = entry.size is None
+            if entry.size is not None:
+                info.file_size = entry.size
+
+            try:
+                with zf.open(info, mode="w", force_zip64=force_zip64) as dest:
+                    while chunk := await source.read(READ_CHUNK_SIZE):
+                        if stored:
+                            dest.write(chunk)
+                        else:
+                            await asyncio.to_thread(dest.write, chunk) # deflate off the event loop
+                        yield sink.drain()
+            finally:
+                await source.close()
+            yield sink.drain()
+    # central directory (zip64 records are added automatically when needed)
+    yield sink.drain()
@@ -1,2 +1,6 @@
 from .crud_user import user
-from .crud_audio import audio_file
\ No newline at end of file
+from .crud_audio import audio_file
+from .crud_idempotency import idempotency_key
+from .crud_library_stats import library_stats
+from .crud_fingerprint import fingerprint
+from .crud_tombstone import storage_tombstone
\ No newline at end of file
@@ -1,8 +1,9 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete
+from sqlalchemy import any_, bindparam, update as sqlalchemy_update, delete as sqlalchemy_delete
+from sqlalchemy.dialects.postgresql import ARRAY
 from app.db.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -17,6 +18,18 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(select(self.model).filter(self.model.id == id))
         return result.scalars().first()
 
+    def _get_many_query(self, ids: Sequence[Any], **filters: Any):
+        # one array parameter instead of an IN list, so every batch size shares a prepared statement
+        ids_param = bindparam("ids", list(ids), type_=ARRAY(self.model.id.type))
+        return select(self.model).filter(self.model.id == any_(ids_param)).filter_by(**filters)
+
+    async def get_many(self, db: AsyncSession, *, ids: Sequence[Any], **filters: Any) -> List[ModelType]:
+        """Rows whose id is in `ids` (and matching `filters`), in no particular order."""
+        if not ids:
+            return []
+        result = await db.execute(self._get_many_query(ids, **filters))
+        return result.scalars().all()
+
     async def get_multi(self, db: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[ModelType]:
         result = await db.execute(
             select(self.model)
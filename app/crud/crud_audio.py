@@ -1,10 +1,19 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from sqlalchemy import delete as sqlalchemy_delete, func, update as sqlalchemy_update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
 
 from app.crud.base import CRUDBase
+from app.crud.crud_library_stats import library_stats
+from app.crud.crud_tombstone import storage_tombstone
 from app.models.audio import AudioFile
-from app.schemas.audio import AudioUpdate # using placeholder schemas
+from app.schemas.audio import AudioUpdate, AudioFilter, AudioSortField # using placeholder schemas
+
+def _escape_like(value: str) -> str:
+    # escape LIKE wildcards so user input is matched literally
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 class CRUDAudioFile(CRUDBase[AudioFile, AudioFile, AudioUpdate]): # placeholder schemas
     async def create_with_owner(
@@ -16,26 +25,221 @@ class CRUDAudioFile(CRUDBase[AudioFile, AudioFile, AudioUpdate]): # placeholder
         file_path: str,
         content_type: Optional[str],
         user_id: int,
+        size: Optional[int] = None,
+        checksum: Optional[str] = None,
     ) -> AudioFile:
         db_obj = AudioFile(
             original_filename=original_filename,
             stored_filename=stored_filename,
             file_path=file_path,
             content_type=content_type,
+            size=size,
+            checksum=checksum,
             user_id=user_id
         )
         db.add(db_obj)
-        await db.commit()
+        await db.flush()
+        await library_stats.apply_delta(
+            db, user_id=user_id, content_type=content_type, created_at=func.now(), file_count=1, total_bytes=size or 0
+        )
         await db.refresh(db_obj)
-        return db_obj
+        return db_obj # the caller commits, together with anything else that belongs to the upload
+
+    async def get(self, db: AsyncSession, id: Any, *, include_deleted: bool = False) -> Optional[AudioFile]:
+        query = select(self.model).filter(AudioFile.id == id)
+        if not include_deleted:
+            query = query.filter(AudioFile.deleted_at.is_(None))
+        result = await db.execute(query)
+        return result.scalars().first()
+
+    async def get_many(self, db: AsyncSession, *, ids: Sequence[Any], include_deleted: bool = False, **filters: Any) -> List[AudioFile]:
+        if not ids:
+            return []
+        query = self._get_many_query(ids, **filters)
+        if not include_deleted:
+            query = query.filter(AudioFile.deleted_at.is_(None))
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    async def remove(self, db: AsyncSession, *, id: int) -> AudioFile | None:
+        # immediate delete of the row only; soft_delete() is what removes a file from a library
+        obj = await self.get(db=db, id=id, include_deleted=True)
+        if obj:
+            await db.delete(obj)
+            if obj.deleted_at is None: # soft-deleted rows were already subtracted
+                await library_stats.apply_delta(
+                    db, user_id=obj.user_id, content_type=obj.content_type, created_at=obj.created_at,
+                    file_count=-1, total_bytes=-(obj.size or 0),
+                )
+            await db.commit()
+        return obj
+
+    async def soft_delete(self, db: AsyncSession, *, audio: AudioFile, purge_after: datetime) -> bool:
+        """
+        Hides the file and schedules its removal from disk after `purge_after`.
+        Returns False if it was already deleted by a concurrent request. The caller commits.
+        """
+        result = await db.execute(
+            sqlalchemy_update(AudioFile)
+            .where(AudioFile.id == audio.id, AudioFile.deleted_at.is_(None))
+            .values(deleted_at=func.now())
+            .returning(AudioFile.deleted_at)
+        )
+        deleted_at = result.scalar()
+        if deleted_at is None:
+            return False
+        audio.deleted_at = deleted_at
+        await library_stats.apply_delta(
+            db, user_id=audio.user_id, content_type=audio.content_type, created_at=audio.created_at,
+            file_count=-1, total_bytes=-(audio.size or 0),
+        )
+        await storage_tombstone.add_for_audio(db, audio=audio, purge_after=purge_after)
+        return True
+
+    async def restore(self, db: AsyncSession, *, audio: AudioFile) -> bool:
+        """Undeletes a soft-deleted file. False if the reclaim job has already removed it. The caller commits."""
+        if not await storage_tombstone.release_for_audio(db, audio_id=audio.id):
+            return False
+        await db.execute(sqlalchemy_update(AudioFile).where(AudioFile.id == audio.id).values(deleted_at=None))
+        audio.deleted_at = None
+        await library_stats.apply_delta(
+            db, user_id=audio.user_id, content_type=audio.content_type, created_at=audio.created_at,
+            file_count=1, total_bytes=audio.size or 0,
+        )
+        return True
+
+    async def rename(self, db: AsyncSession, *, audio: AudioFile, original_filename: str) -> AudioFile:
+        audio.original_filename = original_filename
+        db.add(audio)
+        await library_stats.bump_version(db, user_id=audio.user_id)
+        await db.flush()
+        return audio # the caller commits
+
+    async def purge(self, db: AsyncSession, *, ids: Sequence[int]) -> None:
+        """Deletes soft-deleted rows whose files are gone. Stats were updated at soft-delete time."""
+        if ids:
+            await db.execute(
+                sqlalchemy_delete(AudioFile).where(AudioFile.id.in_(ids), AudioFile.deleted_at.is_not(None))
+            )
+
+    async def remove_all_by_owner(self, db: AsyncSession, *, user_id: int, purge_after: datetime) -> None:
+        """Deletes all of a user's rows and tombstones their files. The caller commits."""
+        await storage_tombstone.add_for_owner(db, user_id=user_id, purge_after=purge_after)
+        await db.execute(sqlalchemy_delete(AudioFile).where(AudioFile.user_id == user_id))
 
     async def get_multi_by_owner(self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100) -> List[AudioFile]:
         result = await db.execute(
             select(self.model)
-            .filter(AudioFile.user_id == user_id)
+            .filter(AudioFile.user_id == user_id, AudioFile.deleted_at.is_(None))
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    def apply_filter(self, query, filters: AudioFilter):
+        """Adds the WHERE clauses described by `filters` to a select over AudioFile."""
+        if filters.q:
+            query = query.filter(AudioFile.original_filename.ilike(f"%{_escape_like(filters.q)}%", escape="\\"))
+        if filters.content_type:
+            query = query.filter(AudioFile.content_type == filters.content_type)
+        if filters.created_from is not None:
+            query = query.filter(AudioFile.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            query = query.filter(AudioFile.created_at < filters.created_to)
+        if filters.min_size is not None:
+            query = query.filter(AudioFile.size >= filters.min_size)
+        if filters.max_size is not None:
+            query = query.filter(AudioFile.size <= filters.max_size)
+        if filters.min_duration is not None:
+            query = query.filter(AudioFile.duration >= filters.min_duration)
+        if filters.max_duration is not None:
+            query = query.filter(AudioFile.duration <= filters.max_duration)
+        return query
+
+    async def search_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        filters: AudioFilter,
+        sort: AudioSortField = AudioSortField.created_at,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[AudioFile]:
+        """Filtered and sorted listing of a user's files, served by the per-user composite indexes."""
+        column = getattr(AudioFile, sort.value.lstrip("-"))
+        descending = sort.value.startswith("-")
+        # postgres' default NULL placement (last ascending, first descending) is what a forward or
+        # backward scan of the (user_id, column, id) indexes returns, so no sort step is needed
+        order = column.desc() if descending else column.asc()
+        tie_breaker = AudioFile.id.desc() if descending else AudioFile.id.asc() # stable paging
+        query = self.apply_filter(
+            select(self.model).filter(AudioFile.user_id == user_id, AudioFile.deleted_at.is_(None)), filters
+        )
+        result = await db.execute(
+            query
+            .order_by(order, tie_breaker)
             .offset(skip)
             .limit(limit)
         )
         return result.scalars().all()
 
-audio_file = CRUDAudioFile(AudioFile)
\ No newline at end of file
+    async def get_batch_by_owner_after(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        after_id: int = 0,
+        limit: int = 500,
+        filters: Optional[AudioFilter] = None,
+    ) -> List[AudioFile]:
+        """Keyset page of a user's files ordered by id, for walking a whole library without OFFSET."""
+        query = select(self.model).filter(
+            AudioFile.user_id == user_id, AudioFile.id > after_id, AudioFile.deleted_at.is_(None)
+        )
+        if filters is not None:
+            query = self.apply_filter(query, filters)
+        result = await db.execute(query.order_by(AudioFile.id).limit(limit))
+        return result.scalars().all()
+
+    async def record_integrity(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        integrity_status: str,
+        checksum: Optional[str] = None,
+        size: Optional[int] = None,
+    ) -> None:
+        """Stores a scrubber result. checksum/size are only set when the row had none (legacy uploads)."""
+        values = {"integrity_status": integrity_status, "verified_at": func.now()}
+        if checksum is not None:
+            values["checksum"] = checksum
+        if size is not None:
+            values["size"] = size
+        # only a visible change bumps the library version; re-verifying an unchanged file does not.
+        # the self-join returns the row as it was before the update
+        previous = aliased(AudioFile)
+        result = await db.execute(
+            sqlalchemy_update(AudioFile)
+            .where(AudioFile.id == id, previous.id == AudioFile.id)
+            .values(**values)
+            .returning(
+                AudioFile.user_id, AudioFile.content_type, AudioFile.created_at,
+                previous.integrity_status, previous.size, previous.deleted_at,
+            )
+        )
+        row = result.first()
+        if row is None:
+            return
+        user_id, content_type, created_at, previous_status, previous_size, deleted_at = row
+        if size is not None and previous_size is None and deleted_at is None:
+            # the file was counted as 0 bytes so far; soft_delete() will subtract the real size.
+            # (a deleted file was already subtracted as 0 bytes and must not be added now)
+            await library_stats.apply_delta(
+                db, user_id=user_id, content_type=content_type, created_at=created_at, file_count=0, total_bytes=size,
+            ) # also bumps the version
+        elif previous_status != integrity_status or checksum is not None or size is not None:
+            await library_stats.bump_version(db, user_id=user_id)
+
+audio_file = CRUDAudioFile(AudioFile)
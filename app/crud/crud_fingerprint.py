@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import List, Optional, Sequence
+from sqlalchemy import Integer, bindparam, delete as sqlalchemy_delete, func, text, update as sqlalchemy_update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
+
+from app.crud.base import CRUDBase
+from app.models.audio import AudioFile
+from app.models.fingerprint import AudioFingerprint, AudioDuplicate
+
+_INSERT_HASHES = text(
+    "INSERT INTO audio_fingerprints (hash, audio_id, time_offset) "
+    "SELECT h, :audio_id, o FROM unnest(:hashes, :offsets) AS t(h, o)"
+).bindparams(bindparam("hashes", type_=ARRAY(Integer)), bindparam("offsets", type_=ARRAY(Integer)))
+
+# for every other file sharing hashes, count matches per relative offset and keep
+# the best alignment; unrelated files share hashes too, but not at one offset
+_FIND_MATCHES = text("""
+    SELECT s.audio_id, a.user_id, a.fingerprint_hash_count, max(s.matches) AS matches
+    FROM (
+        SELECT f.audio_id, count(*) AS matches
+        FROM unnest(:hashes, :offsets) AS q(hash, time_offset)
+        JOIN audio_fingerprints f ON f.hash = q.hash
+        WHERE f.audio_id <> :audio_id
+        GROUP BY f.audio_id, f.time_offset - q.time_offset
+        HAVING count(*) >= :min_matches
+    ) s
+    JOIN audio_files a ON a.id = s.audio_id AND a.deleted_at IS NULL
+    GROUP BY s.audio_id, a.user_id, a.fingerprint_hash_count
+    ORDER BY matches DESC
+    LIMIT :limit
+""").bindparams(bindparam("hashes", type_=ARRAY(Integer)), bindparam("offsets", type_=ARRAY(Integer)))
+
+# transaction-level advisory lock taken while matching and storing a fingerprint
+_MATCH_LOCK_KEY = 0x66707269 # 'fpri'
+
+class CRUDFingerprint(CRUDBase[AudioFingerprint, AudioFingerprint, AudioFingerprint]): # placeholder schemas
+    async def claim_pending(self, db: AsyncSession, *, stale_before: datetime):
+        """
+        Marks the next file without a fingerprint as 'processing' and returns
+        (id, user_id, file_path, fingerprint_claimed_at), or None. Claims older than
+        `stale_before` belong to workers that died and are taken over first.
+        The caller commits, so the row is not locked while the file is processed.
+        """
+        for condition in (
+            (AudioFile.fingerprint_status == "processing") & (AudioFile.fingerprint_claimed_at < stale_before),
+            AudioFile.fingerprint_status.is_(None),
+        ):
+            candidate = (
+                select(AudioFile.id)
+                .filter(condition, AudioFile.deleted_at.is_(None))
+                .order_by(AudioFile.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            result = await db.execute(
+                sqlalchemy_update(AudioFile)
+                .where(AudioFile.id == candidate)
+                .values(fingerprint_status="processing", fingerprint_claimed_at=func.now())
+                .returning(AudioFile.id, AudioFile.user_id, AudioFile.file_path, AudioFile.fingerprint_claimed_at)
+                .execution_options(synchronize_session=False)
+            )
+            row = result.first()
+            if row is not None:
+                return row
+        return None
+
+    async def get_claimed(self, db: AsyncSession, *, audio_id: int, claimed_at: datetime) -> Optional[AudioFile]:
+        """Locks the file if it is still claimed by the caller (not taken over, not purged)."""
+        result = await db.execute(
+            select(AudioFile)
+            .filter(
+                AudioFile.id == audio_id,
+                AudioFile.fingerprint_status == "processing",
+                AudioFile.fingerprint_claimed_at == claimed_at,
+            )
+            .with_for_update()
+        )
+        return result.scalars().first()
+
+    async def lock_for_matching(self, db: AsyncSession) -> None:
+        """
+        Serializes matching+storing across job workers until the transaction ends, so two
+        copies fingerprinted at the same time still see each other's committed hashes.
+        """
+        await db.execute(select(func.pg_advisory_xact_lock(_MATCH_LOCK_KEY)))
+
+    async def replace_hashes(self, db: AsyncSession, *, audio_id: int, hashes: Sequence[int], offsets: Sequence[int]) -> None:
+        await db.execute(sqlalchemy_delete(AudioFingerprint).where(AudioFingerprint.audio_id == audio_id))
+        if hashes:
+            await db.execute(_INSERT_HASHES, {"audio_id": audio_id, "hashes": list(hashes), "offsets": list(offsets)})
+
+    async def find_matches(
+        self, db: AsyncSession, *, audio_id: int, hashes: Sequence[int], offsets: Sequence[int],
+        min_matches: int, limit: int = 50,
+    ):
+        """[(audio_id, user_id, fingerprint_hash_count, matches)] of files that likely contain the same audio."""
+        if not hashes:
+            return []
+        result = await db.execute(_FIND_MATCHES, {
+            "audio_id": audio_id, "hashes": list(hashes), "offsets": list(offsets),
+            "min_matches": min_matches, "limit": limit,
+        })
+        return result.all()
+
+    async def save_duplicate(
+        self, db: AsyncSession, *, audio: AudioFile, other_id: int, other_user_id: int, matches: int, score: float
+    ) -> None:
+        first, second = sorted(((audio.id, audio.user_id), (other_id, other_user_id)))
+        stmt = insert(AudioDuplicate).values(
+            audio_id=first[0], user_id=first[1], duplicate_id=second[0], duplicate_user_id=second[1],
+            matches=matches, score=score,
+        )
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[AudioDuplicate.audio_id, AudioDuplicate.duplicate_id],
+            set_={"matches": stmt.excluded.matches, "score": stmt.excluded.score},
+        ))
+
+    async def get_duplicates(
+        self, db: AsyncSession, *, user_id: Optional[int] = None, min_score: float = 0.0, skip: int = 0, limit: int = 100
+    ) -> List[tuple]:
+        """[(AudioDuplicate, AudioFile, AudioFile)] ordered by score. With user_id, only pairs inside that library."""
+        first, second = aliased(AudioFile), aliased(AudioFile)
+        query = (
+            select(AudioDuplicate, first, second)
+            .join(first, first.id == AudioDuplicate.audio_id)
+            .join(second, second.id == AudioDuplicate.duplicate_id)
+            .filter(AudioDuplicate.score >= min_score, first.deleted_at.is_(None), second.deleted_at.is_(None))
+        )
+        if user_id is not None:
+            query = query.filter(AudioDuplicate.user_id == user_id, AudioDuplicate.duplicate_user_id == user_id)
+        result = await db.execute(
+            query.order_by(AudioDuplicate.score.desc(), AudioDuplicate.audio_id, AudioDuplicate.duplicate_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.all()
+
+fingerprint = CRUDFingerprint(AudioFingerprint)
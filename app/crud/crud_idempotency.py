@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete as sqlalchemy_delete, update as sqlalchemy_update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.crud.base import CRUDBase
+from app.models.idempotency import IdempotencyKey
+
+class CRUDIdempotencyKey(CRUDBase[IdempotencyKey, IdempotencyKey, IdempotencyKey]): # placeholder schemas
+    async def try_create(
+        self, db: AsyncSession, *, user_id: int, key: str, request_hash: str, expires_at: datetime
+    ) -> Optional[int]:
+        """Inserts an in-progress record. Returns its id, or None if the key is already taken."""
+        result = await db.execute(
+            insert(IdempotencyKey)
+            .values(user_id=user_id, key=key, request_hash=request_hash, status="in_progress", expires_at=expires_at)
+            .on_conflict_do_nothing(constraint="uq_idempotency_keys_user_id_key")
+            .returning(IdempotencyKey.id)
+        )
+        record_id = result.scalar()
+        await db.commit()
+        return record_id
+
+    async def get_by_key(self, db: AsyncSession, *, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        result = await db.execute(
+            select(self.model)
+            .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .execution_options(populate_existing=True) # always re-read, other requests update the row
+        )
+        record = result.scalars().first()
+        await db.commit() # don't sit idle in a transaction while waiting
+        return record
+
+    async def complete(self, db: AsyncSession, *, id: int, response_status: int, response_body: Optional[str]) -> None:
+        await db.execute(
+            sqlalchemy_update(IdempotencyKey)
+            .where(IdempotencyKey.id == id)
+            .values(status="completed", response_status=response_status, response_body=response_body)
+        ) # the caller commits, together with the work the key protects
+
+    async def remove_if(self, db: AsyncSession, *, id: int, status: Optional[str] = None, created_before: Optional[datetime] = None) -> bool:
+        """Deletes the record if it still matches the given conditions. Returns whether it was deleted."""
+        stmt = sqlalchemy_delete(IdempotencyKey).where(IdempotencyKey.id == id)
+        if status is not None:
+            stmt = stmt.where(IdempotencyKey.status == status)
+        if created_before is not None:
+            stmt = stmt.where(IdempotencyKey.created_at < created_before)
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount == 1
+
+    async def remove_expired(self, db: AsyncSession, *, now: datetime) -> int:
+        result = await db.execute(sqlalchemy_delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+        await db.commit()
+        return result.rowcount
+
+idempotency_key = CRUDIdempotencyKey(IdempotencyKey)
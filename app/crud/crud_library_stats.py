@@ -0,0 +1,145 @@
+from datetime import datetime
+from typing import List, Optional, Union
+from sqlalchemy import Date, cast, delete as sqlalchemy_delete, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.crud.base import CRUDBase
+from app.models.audio import AudioFile
+from app.models.library_stats import UserLibraryStats, UserLibraryStatsBreakdown
+
+def _month_of(created_at: Union[datetime, ColumnElement]) -> ColumnElement:
+    # months are bucketed in UTC regardless of the server's timezone setting
+    return cast(func.date_trunc("month", func.timezone("UTC", created_at)), Date)
+
+class CRUDLibraryStats(CRUDBase[UserLibraryStats, UserLibraryStats, UserLibraryStats]): # placeholder schemas
+    async def apply_delta(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        content_type: Optional[str],
+        created_at: Union[datetime, ColumnElement],
+        file_count: int,
+        total_bytes: int,
+    ) -> None:
+        """
+        Adds to a user's totals. Does not commit: call it inside the transaction
+        that changes audio_files so the stats can never drift from the data.
+        The summary row is always updated first; rebuild_for_user relies on that lock order.
+        Also bumps the library version.
+        """
+        summary = insert(UserLibraryStats).values(user_id=user_id, file_count=file_count, total_bytes=total_bytes, version=1)
+        await db.execute(summary.on_conflict_do_update(
+            index_elements=[UserLibraryStats.user_id],
+            set_={
+                "file_count": UserLibraryStats.file_count + summary.excluded.file_count,
+                "total_bytes": UserLibraryStats.total_bytes + summary.excluded.total_bytes,
+                "version": UserLibraryStats.version + 1,
+                "updated_at": func.now(),
+            },
+        ))
+        breakdown = insert(UserLibraryStatsBreakdown).values(
+            user_id=user_id,
+            content_type=content_type or "",
+            month=_month_of(created_at),
+            file_count=file_count,
+            total_bytes=total_bytes,
+        )
+        await db.execute(breakdown.on_conflict_do_update(
+            index_elements=[UserLibraryStatsBreakdown.user_id, UserLibraryStatsBreakdown.content_type, UserLibraryStatsBreakdown.month],
+            set_={
+                "file_count": UserLibraryStatsBreakdown.file_count + breakdown.excluded.file_count,
+                "total_bytes": UserLibraryStatsBreakdown.total_bytes + breakdown.excluded.total_bytes,
+            },
+        ))
+
+    async def bump_version(self, db: AsyncSession, *, user_id: int) -> None:
+        """
+        Marks the user's library as changed, invalidating cached reads. Does not commit:
+        call it in the transaction that changes file metadata without changing the totals.
+        """
+        stmt = insert(UserLibraryStats).values(user_id=user_id, file_count=0, total_bytes=0, version=1)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserLibraryStats.user_id],
+            set_={"version": UserLibraryStats.version + 1},
+        ))
+
+    async def get_version(self, db: AsyncSession, *, user_id: int) -> int:
+        result = await db.execute(select(UserLibraryStats.version).filter(UserLibraryStats.user_id == user_id))
+        return result.scalar() or 0
+
+    async def get_for_user(self, db: AsyncSession, *, user_id: int) -> Optional[UserLibraryStats]:
+        result = await db.execute(select(UserLibraryStats).filter(UserLibraryStats.user_id == user_id))
+        return result.scalars().first()
+
+    async def get_breakdown_for_user(self, db: AsyncSession, *, user_id: int) -> List[UserLibraryStatsBreakdown]:
+        result = await db.execute(
+            select(UserLibraryStatsBreakdown)
+            .filter(UserLibraryStatsBreakdown.user_id == user_id, UserLibraryStatsBreakdown.file_count != 0)
+        )
+        return result.scalars().all()
+
+    async def get_totals(self, db: AsyncSession):
+        """Totals across all users: (user_count, file_count, total_bytes)."""
+        result = await db.execute(
+            select(
+                func.count().filter(UserLibraryStats.file_count > 0),
+                func.coalesce(func.sum(UserLibraryStats.file_count), 0),
+                func.coalesce(func.sum(UserLibraryStats.total_bytes), 0),
+            )
+        )
+        return result.one()
+
+    async def get_totals_by_content_type(self, db: AsyncSession):
+        """Totals across all users per content type: [(content_type, file_count, total_bytes)]."""
+        result = await db.execute(
+            select(
+                UserLibraryStatsBreakdown.content_type,
+                func.sum(UserLibraryStatsBreakdown.file_count),
+                func.sum(UserLibraryStatsBreakdown.total_bytes),
+            )
+            .group_by(UserLibraryStatsBreakdown.content_type)
+            .having(func.sum(UserLibraryStatsBreakdown.file_count) != 0)
+            .order_by(UserLibraryStatsBreakdown.content_type)
+        )
+        return result.all()
+
+    async def rebuild_for_user(self, db: AsyncSession, *, user_id: int) -> None:
+        """Recomputes a user's stats from audio_files. Safe to run while the user uploads or deletes."""
+        # lock the summary row so concurrent apply_delta calls wait and apply on top of the rebuilt values
+        await db.execute(insert(UserLibraryStats).values(user_id=user_id, file_count=0, total_bytes=0).on_conflict_do_nothing())
+        await db.execute(select(UserLibraryStats.user_id).filter(UserLibraryStats.user_id == user_id).with_for_update())
+        await db.execute(sqlalchemy_delete(UserLibraryStatsBreakdown).where(UserLibraryStatsBreakdown.user_id == user_id))
+
+        files = select(AudioFile).filter(AudioFile.user_id == user_id, AudioFile.deleted_at.is_(None)).subquery()
+        month = _month_of(files.c.created_at)
+        content_type = func.coalesce(files.c.content_type, "")
+        await db.execute(
+            insert(UserLibraryStatsBreakdown).from_select(
+                ["user_id", "content_type", "month", "file_count", "total_bytes"],
+                select(
+                    literal(user_id),
+                    content_type,
+                    month,
+                    func.count(),
+                    func.coalesce(func.sum(files.c.size), 0),
+                ).group_by(content_type, month),
+            )
+        )
+        totals = await db.execute(
+            select(func.count(), func.coalesce(func.sum(files.c.size), 0))
+        )
+        file_count, total_bytes = totals.one()
+        summary = await db.execute(
+            select(UserLibraryStats).filter(UserLibraryStats.user_id == user_id)
+            .execution_options(populate_existing=True)
+        )
+        stats = summary.scalars().one()
+        stats.file_count = file_count
+        stats.total_bytes = total_bytes
+        await db.commit()
+
+library_stats = CRUDLibraryStats(UserLibraryStats)
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import List, Sequence
+from sqlalchemy import delete as sqlalchemy_delete, func, insert, literal, update as sqlalchemy_update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.crud.base import CRUDBase
+from app.models.audio import AudioFile
+from app.models.tombstone import StorageTombstone
+
+class CRUDStorageTombstone(CRUDBase[StorageTombstone, StorageTombstone, StorageTombstone]): # placeholder schemas
+    async def add_for_audio(self, db: AsyncSession, *, audio: AudioFile, purge_after: datetime) -> None:
+        db.add(StorageTombstone(file_path=audio.file_path, audio_id=audio.id, purge_after=purge_after))
+
+    async def add_for_owner(self, db: AsyncSession, *, user_id: int, purge_after: datetime) -> None:
+        """Tombstones every file of a user whose rows are about to be deleted (no undelete)."""
+        # files that are already soft-deleted keep their tombstone, with the current path and no grace period
+        await db.execute(
+            sqlalchemy_update(StorageTombstone)
+            .where(StorageTombstone.audio_id == AudioFile.id, AudioFile.user_id == user_id)
+            .values(file_path=AudioFile.file_path, purge_after=purge_after)
+        )
+        await db.execute(
+            insert(StorageTombstone).from_select(
+                ["file_path", "purge_after"],
+                select(AudioFile.file_path, literal(purge_after, StorageTombstone.purge_after.type))
+                .filter(AudioFile.user_id == user_id, AudioFile.deleted_at.is_(None)),
+            )
+        )
+
+    async def release_for_audio(self, db: AsyncSession, *, audio_id: int) -> bool:
+        """Drops the tombstone of a soft-deleted file. False if the reclaim job already took it."""
+        # blocks while the reclaim job holds the row, then sees it gone
+        result = await db.execute(
+            sqlalchemy_delete(StorageTombstone).where(StorageTombstone.audio_id == audio_id).returning(StorageTombstone.id)
+        )
+        return result.scalar() is not None
+
+    async def claim_due(self, db: AsyncSession, *, now: datetime, limit: int) -> List[tuple]:
+        """
+        Locks up to `limit` tombstones whose grace period is over: [(id, audio_id, attempts, file_path)].
+        The path is read from the AudioFile row when there is one, since the storage
+        layout migration may have moved the file after it was deleted.
+        """
+        result = await db.execute(
+            select(
+                StorageTombstone.id,
+                StorageTombstone.audio_id,
+                StorageTombstone.attempts,
+                func.coalesce(AudioFile.file_path, StorageTombstone.file_path),
+            )
+            .outerjoin(AudioFile, AudioFile.id == StorageTombstone.audio_id)
+            .filter(StorageTombstone.purge_after <= now)
+            .order_by(StorageTombstone.purge_after)
+            .limit(limit)
+            .with_for_update(of=StorageTombstone, skip_locked=True)
+        )
+        return result.all()
+
+    async def record_failure(self, db: AsyncSession, *, id: int, error: str, retry_at: datetime) -> None:
+        await db.execute(
+            sqlalchemy_update(StorageTombstone)
+            .where(StorageTombstone.id == id)
+            .values(attempts=StorageTombstone.attempts + 1, last_error=error[:1000], purge_after=retry_at)
+        )
+
+    async def remove_many(self, db: AsyncSession, *, ids: Sequence[int]) -> None:
+        if ids:
+            await db.execute(sqlalchemy_delete(StorageTombstone).where(StorageTombstone.id.in_(ids)))
+
+storage_tombstone = CRUDStorageTombstone(StorageTombstone)
@@ -1,3 +1,7 @@
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
-from app.models.audio import AudioFile # noqa
\ No newline at end of file
+from app.models.audio import AudioFile # noqa
+from app.models.idempotency import IdempotencyKey # noqa
+from app.models.library_stats import UserLibraryStats, UserLibraryStatsBreakdown # noqa
+from app.models.fingerprint import AudioFingerprint, AudioDuplicate # noqa
+from app.models.tombstone import StorageTombstone # noqa
\ No newline at end of file
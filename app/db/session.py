@@ -1,11 +1,14 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from app.core import tracing
 from app.core.config import settings
 
 async_engine = create_async_engine(
     settings.DATABASE_URI,
     pool_pre_ping=True,
 )
+if settings.TRACING_ENABLED:
+    tracing.instrument_engine(async_engine) # 'db' spans for traced requests
 
 AsyncSessionLocal = sessionmaker(
     bind=async_engine,
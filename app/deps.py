@@ -1,10 +1,10 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core import security
+from app.core import security, tracing
 from app.db.session import get_db # Import async get_db
 from app.models.user import User
 from app.crud import user as crud_user
@@ -24,16 +24,17 @@ async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depe
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = security.decode_token(token)
-    if not token_data or token_data.refresh: # ensure it's an access token
-        raise credentials_exception
-    if not token_data.sub: # ensure it's a valid user
-        raise credentials_exception
+    with tracing.span("auth"):
+        token_data = security.decode_token(token)
+        if not token_data or token_data.refresh: # ensure it's an access token
+            raise credentials_exception
+        if not token_data.sub: # ensure it's a valid user
+            raise credentials_exception
 
-    user = await crud_user.get(db, id=int(token_data.sub))
-    if user is None:
-        raise credentials_exception
-    return user
+        user = await crud_user.get(db, id=int(token_data.sub))
+        if user is None:
+            raise credentials_exception
+        return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
@@ -52,4 +53,15 @@ async def get_current_active_superuser(current_user: User = Depends(get_current_
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges",
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", max_length=255,
+        description="Client-chosen key; retries with the same key return the original result",
+    )
+) -> Optional[str]:
+    """
+    Dependency to read the optional Idempotency-Key header.
+    """
+    return idempotency_key
\ No newline at end of file
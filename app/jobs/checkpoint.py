@@ -0,0 +1,18 @@
+import os
+import pathlib
+
+# progress checkpoints for resumable batch jobs: the last processed id, in a file
+
+
+def read_checkpoint(path: pathlib.Path) -> int:
+    try:
+        return int(path.read_text().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path: pathlib.Path, last_id: int) -> None:
+    # written to a temporary file and renamed, so a crash never leaves a partial checkpoint
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(str(last_id))
+    os.replace(tmp, path)
@@ -0,0 +1,137 @@
+"""
+Computes acoustic fingerprints for new uploads and records likely duplicates.
+
+    python -m app.jobs.fingerprint [--once]
+
+Decoding and the STFT run in a process pool (settings.FINGERPRINT_WORKERS);
+several instances can run side by side. A file is claimed by marking it
+'processing' in a short transaction, so no row lock or transaction is held
+while it is decoded; claims older than settings.FINGERPRINT_CLAIM_TIMEOUT_SECONDS
+(a worker that died) are taken over.
+The job also fills in AudioFile.duration from the decoded audio and reports
+progress to the owner's event stream (processing-progress events).
+"""
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func
+
+from app import crud
+from app.core import events, storage
+from app.core.config import settings
+from app.core.fingerprint import Fingerprint, fingerprint_file
+from app.db.session import AsyncSessionLocal
+
+POLL_INTERVAL_SECONDS = 5.0
+
+
+async def _record_failure(audio_id: int, claimed_at: datetime) -> None:
+    async with AsyncSessionLocal() as db:
+        audio = await crud.fingerprint.get_claimed(db, audio_id=audio_id, claimed_at=claimed_at)
+        if audio is None:
+            await db.rollback()
+            return
+        audio.fingerprint_status = "failed"
+        audio.fingerprinted_at = func.now()
+        await crud.library_stats.bump_version(db, user_id=audio.user_id)
+        await events.publish(
+            db, user_id=audio.user_id, event_type="processing-progress", data={"id": audio.id, "stage": "failed"}
+        )
+        await db.commit()
+
+
+async def _record_result(audio_id: int, claimed_at: datetime, fp: Fingerprint) -> Optional[int]:
+    """Stores the fingerprint and duplicates. Returns the number of duplicates, None if the claim was lost."""
+    hashes, offsets = fp.hashes.tolist(), fp.offsets.tolist()
+    async with AsyncSessionLocal() as db:
+        await crud.fingerprint.lock_for_matching(db)
+        # the match query runs before the row is locked, to keep the row lock short
+        matches = await crud.fingerprint.find_matches(
+            db, audio_id=audio_id, hashes=hashes, offsets=offsets, min_matches=settings.FINGERPRINT_MIN_MATCHES
+        )
+        audio = await crud.fingerprint.get_claimed(db, audio_id=audio_id, claimed_at=claimed_at)
+        if audio is None:
+            await db.rollback()
+            return None
+        await crud.fingerprint.replace_hashes(db, audio_id=audio.id, hashes=hashes, offsets=offsets)
+        for other_id, other_user_id, other_hash_count, matched in matches:
+            smaller = min(len(hashes), other_hash_count or len(hashes))
+            await crud.fingerprint.save_duplicate(
+                db, audio=audio, other_id=other_id, other_user_id=other_user_id,
+                matches=matched, score=min(1.0, matched / max(1, smaller)),
+            )
+        if audio.duration is None:
+            audio.duration = fp.duration
+        audio.fingerprint_hash_count = len(hashes)
+        audio.fingerprint_status = "ok"
+        audio.fingerprinted_at = func.now()
+        await crud.library_stats.bump_version(db, user_id=audio.user_id) # duration and status are part of listings
+        await events.publish(
+            db, user_id=audio.user_id, event_type="processing-progress",
+            data={"id": audio.id, "stage": "done", "duration": audio.duration, "duplicates": len(matches)},
+        )
+        await db.commit()
+    return len(matches)
+
+
+async def process_next(pool: ProcessPoolExecutor) -> bool:
+    """Fingerprints one pending file. Returns False when there is nothing to do."""
+    loop = asyncio.get_running_loop()
+    # claim the file in a short transaction; no transaction is open while it is processed
+    async with AsyncSessionLocal() as db:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.FINGERPRINT_CLAIM_TIMEOUT_SECONDS)
+        claimed = await crud.fingerprint.claim_pending(db, stale_before=stale_before)
+        if claimed is None:
+            await db.rollback()
+            return False
+        audio_id, user_id, file_path, claimed_at = claimed
+        await crud.library_stats.bump_version(db, user_id=user_id) # 'processing' shows in listings
+        await events.publish(
+            db, user_id=user_id, event_type="processing-progress", data={"id": audio_id, "stage": "fingerprinting"}
+        )
+        await db.commit()
+
+    try:
+        fp = await loop.run_in_executor(pool, fingerprint_file, str(storage.full_path(file_path)))
+    except Exception as e:
+        # any failure is recorded, so one bad file can't stop the queue
+        print(f"[{audio_id}] fingerprinting failed: {e!r}")
+        await _record_failure(audio_id, claimed_at)
+        if isinstance(e, BrokenProcessPool):
+            raise # the pool can't be used any more; exit and let the job be restarted
+        return True
+
+    duplicates = await _record_result(audio_id, claimed_at, fp)
+    if duplicates is None:
+        print(f"[{audio_id}] claim was taken over or the file was purged, result discarded")
+    else:
+        print(f"[{audio_id}] {len(fp.hashes)} hashes, {duplicates} likely duplicates")
+    return True
+
+
+async def worker(pool: ProcessPoolExecutor, once: bool) -> None:
+    while True:
+        if not await process_next(pool):
+            if once:
+                return
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+async def run(once: bool) -> None:
+    with ProcessPoolExecutor(max_workers=settings.FINGERPRINT_WORKERS) as pool:
+        await asyncio.gather(*(worker(pool, once) for _ in range(settings.FINGERPRINT_WORKERS)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="exit when no pending files are left")
+    args = parser.parse_args()
+    asyncio.run(run(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Moves existing audio files into the configured fan-out layout without downtime.
+
+    python -m app.jobs.migrate_storage_layout [--batch-size 500] [--mode link|rename] [--dry-run] [--restart]
+
+For every file whose stored path differs from storage.relative_path_for():
+  1. the file is hard-linked (or renamed) to its new location,
+  2. AudioFile.file_path is updated (guarded on the old value),
+  3. in link mode, the old name is unlinked after the batch commits.
+In link mode both paths are valid until the commit, so readers never see a
+missing file. Progress is checkpointed after every batch; re-running resumes.
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+from typing import List, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+from app import crud
+from app.core import storage
+from app.db.session import AsyncSessionLocal
+from app.jobs.checkpoint import read_checkpoint, write_checkpoint
+from app.models.audio import AudioFile
+
+CHECKPOINT_FILE = storage.UPLOAD_DIR / ".migrate_storage_layout.checkpoint"
+
+Move = Tuple[int, str, str] # (audio id, old relative path, new relative path)
+
+
+def place_files(moves: List[Move], mode: str) -> List[Move]:
+    """Creates the new names on disk. Returns the moves that are safe to record in the DB."""
+    placed = []
+    for audio_id, old, new in moves:
+        src, dst = storage.full_path(old), storage.full_path(new)
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            if dst.exists():
+                # left over from an interrupted run
+                if src.exists() and not os.path.samefile(src, dst):
+                    print(f"[{audio_id}] {dst} exists and differs from {src}, skipping")
+                    continue
+            elif not src.exists():
+                print(f"[{audio_id}] source {src} is missing, skipping")
+                continue
+            elif mode == "link":
+                os.link(src, dst)
+            else:
+                os.rename(src, dst)
+            placed.append((audio_id, old, new))
+        except OSError as e:
+            print(f"[{audio_id}] could not move {src} -> {dst}: {e}")
+    return placed
+
+
+def remove_names(moves: List[Move], index: int) -> None:
+    # index 1 removes the old names, index 2 the new ones
+    for move in moves:
+        try:
+            storage.full_path(move[index]).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"[{move[0]}] could not remove {move[index]}: {e}")
+
+
+async def migrate(batch_size: int, mode: str, dry_run: bool) -> None:
+    last_id = read_checkpoint(CHECKPOINT_FILE)
+    moved = skipped = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(AudioFile.id, AudioFile.user_id, AudioFile.stored_filename, AudioFile.file_path)
+                .filter(AudioFile.id > last_id)
+                .order_by(AudioFile.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            moves = []
+            for audio_id, user_id, stored_filename, file_path in rows:
+                target = str(storage.relative_path_for(user_id, stored_filename))
+                if pathlib.PurePosixPath(file_path) != pathlib.PurePosixPath(target):
+                    moves.append((audio_id, file_path, target))
+            if dry_run:
+                for audio_id, old, new in moves:
+                    print(f"[{audio_id}] {old} -> {new}")
+                moved += len(moves)
+                last_id = rows[-1][0]
+                continue
+
+            placed = await asyncio.to_thread(place_files, moves, mode)
+            committed = []
+            for audio_id, old, new in placed:
+                res = await db.execute(
+                    update(AudioFile)
+                    .where(AudioFile.id == audio_id, AudioFile.file_path == old)
+                    .values(file_path=new)
+                )
+                if res.rowcount == 1:
+                    committed.append((audio_id, old, new))
+            # file_path is part of cached listings
+            owners = {audio_id: user_id for audio_id, user_id, _, _ in rows}
+            for user_id in sorted({owners[audio_id] for audio_id, _, _ in committed}):
+                await crud.library_stats.bump_version(db, user_id=user_id)
+            await db.commit()
+
+        if mode == "link":
+            await asyncio.to_thread(remove_names, committed, 1)
+            # rows changed or deleted concurrently keep their old path; drop the extra link
+            stale = [move for move in placed if move not in committed]
+            await asyncio.to_thread(remove_names, stale, 2)
+        moved += len(committed)
+        skipped += len(moves) - len(committed)
+        last_id = rows[-1][0]
+        await asyncio.to_thread(write_checkpoint, CHECKPOINT_FILE, last_id)
+        print(f"processed up to id {last_id}: {moved} moved, {skipped} skipped")
+
+    if not dry_run:
+        await asyncio.to_thread(CHECKPOINT_FILE.unlink, missing_ok=True)
+    print(f"done: {moved} {'would be moved' if dry_run else 'moved'}, {skipped} skipped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--mode", choices=["link", "rename"], default="link",
+                        help="rename avoids needing hard-link support but briefly leaves the DB path stale")
+    parser.add_argument("--dry-run", action="store_true", help="only print the planned moves")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first row")
+    args = parser.parse_args()
+    if args.restart:
+        CHECKPOINT_FILE.unlink(missing_ok=True)
+    asyncio.run(migrate(args.batch_size, args.mode, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
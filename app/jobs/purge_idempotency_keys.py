@@ -0,0 +1,22 @@
+"""
+Deletes expired Idempotency-Key records. Run periodically, e.g. hourly from cron:
+
+    python -m app.jobs.purge_idempotency_keys
+
+Expired keys are also replaced lazily when reused, so this only bounds table size.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from app import crud
+from app.db.session import AsyncSessionLocal
+
+
+async def purge() -> None:
+    async with AsyncSessionLocal() as db:
+        removed = await crud.idempotency_key.remove_expired(db, now=datetime.now(timezone.utc))
+    print(f"removed {removed} expired idempotency keys")
+
+
+if __name__ == "__main__":
+    asyncio.run(purge())
@@ -0,0 +1,45 @@
+"""
+Rebuilds user_library_stats from audio_files, e.g. after a manual data fix.
+
+    python -m app.jobs.rebuild_library_stats [--user-id ID]
+
+Each user is rebuilt in its own short transaction that locks only that user's
+stats row, so it is safe to run while the service is serving traffic.
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from sqlalchemy import union
+from sqlalchemy.future import select
+
+from app import crud
+from app.db.session import AsyncSessionLocal
+from app.models.audio import AudioFile
+from app.models.library_stats import UserLibraryStats
+
+
+async def rebuild(user_id: Optional[int]) -> None:
+    async with AsyncSessionLocal() as db:
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            # users with files, plus users whose stats may be stale after all their files were removed
+            result = await db.execute(union(select(AudioFile.user_id), select(UserLibraryStats.user_id)))
+            user_ids = sorted(result.scalars().all())
+        await db.commit()
+
+        for uid in user_ids:
+            await crud.library_stats.rebuild_for_user(db, user_id=uid)
+    print(f"rebuilt library stats for {len(user_ids)} users")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.user_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Removes deleted files from disk once their grace period is over.
+
+    python -m app.jobs.reclaim_storage [--once]
+
+Tombstones are claimed in batches with SKIP LOCKED, so several instances can
+run side by side. unlink() calls run in a thread pool (settings.RECLAIM_WORKERS).
+A failed removal is retried with exponential backoff; the error is kept in
+storage_tombstones.last_error. Soft-deleted AudioFile rows are deleted together
+with their tombstone, after which they can no longer be restored.
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app import crud
+from app.core import storage
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+POLL_INTERVAL_SECONDS = 30.0
+
+
+def remove_file(file_path: str) -> Optional[str]:
+    """Returns None on success (a file that is already gone counts), else the error."""
+    try:
+        os.unlink(storage.full_path(file_path))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        return str(e)
+    return None
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(settings.RECLAIM_RETRY_SECONDS * 2 ** attempts, settings.RECLAIM_MAX_RETRY_SECONDS))
+
+
+async def reclaim_batch(pool: ThreadPoolExecutor) -> int:
+    """Processes one batch of due tombstones. Returns how many were claimed."""
+    loop = asyncio.get_running_loop()
+    async with AsyncSessionLocal() as db:
+        now = datetime.now(timezone.utc)
+        rows = await crud.storage_tombstone.claim_due(db, now=now, limit=settings.RECLAIM_BATCH_SIZE)
+        if not rows:
+            await db.rollback()
+            return 0
+
+        # the tombstones stay locked while the files are removed, so a restore waits for the outcome
+        errors = await asyncio.gather(*(loop.run_in_executor(pool, remove_file, path) for _, _, _, path in rows))
+
+        done, purged_audio_ids = [], []
+        for (tombstone_id, audio_id, attempts, path), error in zip(rows, errors):
+            if error is None:
+                done.append(tombstone_id)
+                if audio_id is not None:
+                    purged_audio_ids.append(audio_id)
+                continue
+            print(f"[{tombstone_id}] could not remove {path}: {error}")
+            await crud.storage_tombstone.record_failure(
+                db, id=tombstone_id, error=error, retry_at=now + retry_delay(attempts)
+            )
+        await crud.audio_file.purge(db, ids=purged_audio_ids)
+        await crud.storage_tombstone.remove_many(db, ids=done)
+        await db.commit()
+    print(f"removed {len(done)} files, {len(rows) - len(done)} failed")
+    return len(rows)
+
+
+async def run(once: bool) -> None:
+    with ThreadPoolExecutor(max_workers=settings.RECLAIM_WORKERS, thread_name_prefix="reclaim") as pool:
+        while True:
+            claimed = await reclaim_batch(pool)
+            if claimed < settings.RECLAIM_BATCH_SIZE:
+                if once:
+                    return
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="exit when no due tombstones are left")
+    args = parser.parse_args()
+    asyncio.run(run(args.once))
+
+
+if __name__ == "__main__":
+    main()
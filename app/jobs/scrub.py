@@ -0,0 +1,175 @@
+"""
+Re-hashes stored audio files and flags rows whose data no longer matches.
+
+    python -m app.jobs.scrub [--max-runtime SECONDS] [--mmap] [--restart]
+
+Files are hashed in a thread pool (hashlib releases the GIL) with a shared
+bandwidth/IOPS throttle from settings.SCRUB_*. Progress is checkpointed after
+every batch, so a pass can be spread over several nightly windows with
+--max-runtime. Rows uploaded before checksums were recorded get their
+checksum and size backfilled on the first pass.
+"""
+import argparse
+import asyncio
+import hashlib
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.future import select
+
+from app import crud
+from app.core import storage
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.jobs.checkpoint import read_checkpoint, write_checkpoint
+from app.models.audio import AudioFile
+
+CHECKPOINT_FILE = storage.UPLOAD_DIR / ".scrub.checkpoint"
+
+
+class IOThrottle:
+    """Thread-safe pacing of reads by bytes per second and operations per second."""
+
+    def __init__(self, bytes_per_second: int, iops: int):
+        self.bytes_per_second = bytes_per_second
+        self.iops = iops
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def acquire(self, nbytes: int) -> None:
+        cost = 0.0
+        if self.bytes_per_second > 0:
+            cost = max(cost, nbytes / self.bytes_per_second)
+        if self.iops > 0:
+            cost = max(cost, 1 / self.iops)
+        if cost == 0:
+            return
+        # reserve the next free slot and sleep until it starts
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + cost
+        if start > now:
+            time.sleep(start - now)
+
+
+@dataclass
+class ScrubResult:
+    id: int
+    status: str
+    checksum: Optional[str] = None
+    size: Optional[int] = None
+
+
+def hash_file(path: str, throttle: IOThrottle, read_size: int, use_mmap: bool) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb", buffering=0) as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mm) as view:
+                    for offset in range(0, len(mm), read_size):
+                        with view[offset:offset + read_size] as chunk:
+                            throttle.acquire(len(chunk))
+                            digest.update(chunk)
+                            size += len(chunk)
+        else:
+            buf = bytearray(read_size)
+            view = memoryview(buf)
+            while True:
+                throttle.acquire(read_size)
+                n = f.readinto(buf)
+                if not n:
+                    break
+                digest.update(view[:n])
+                size += n
+    return digest.hexdigest(), size
+
+
+def check_file(row, throttle: IOThrottle, read_size: int, use_mmap: bool) -> ScrubResult:
+    audio_id, file_path, expected_checksum, expected_size = row
+    try:
+        checksum, size = hash_file(str(storage.full_path(file_path)), throttle, read_size, use_mmap)
+    except FileNotFoundError:
+        return ScrubResult(audio_id, "missing")
+    except OSError as e:
+        # the file is there but can't be read (EIO, EACCES, ...), which is damage worth reporting as such
+        print(f"[{audio_id}] could not read {file_path}: {e}")
+        return ScrubResult(audio_id, "unreadable")
+
+    if expected_size is not None and size != expected_size:
+        return ScrubResult(audio_id, "truncated")
+    if expected_checksum is None:
+        # legacy row: this pass establishes the baseline
+        return ScrubResult(audio_id, "ok", checksum=checksum, size=size if expected_size is None else None)
+    return ScrubResult(audio_id, "ok" if checksum == expected_checksum else "mismatch")
+
+
+async def scrub(max_runtime: Optional[float], use_mmap: bool) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    throttle = IOThrottle(settings.SCRUB_MAX_BYTES_PER_SECOND, settings.SCRUB_MAX_IOPS)
+    last_id = read_checkpoint(CHECKPOINT_FILE)
+    checked = flagged = 0
+
+    with ThreadPoolExecutor(max_workers=settings.SCRUB_WORKERS, thread_name_prefix="scrub") as pool:
+        while True:
+            if max_runtime is not None and loop.time() - started >= max_runtime:
+                print(f"runtime limit reached, will resume after id {last_id}")
+                return
+
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(AudioFile.id, AudioFile.file_path, AudioFile.checksum, AudioFile.size)
+                    .filter(AudioFile.id > last_id, AudioFile.deleted_at.is_(None))
+                    .order_by(AudioFile.id)
+                    .limit(settings.SCRUB_BATCH_SIZE)
+                )
+                rows = result.all()
+            if not rows:
+                break
+
+            # no DB connection is held while hashing
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, check_file, row, throttle, settings.SCRUB_READ_SIZE, use_mmap)
+                for row in rows
+            ))
+            async with AsyncSessionLocal() as db:
+                for res in results:
+                    if res.status != "ok":
+                        flagged += 1
+                        print(f"[{res.id}] integrity check failed: {res.status}")
+                    await crud.audio_file.record_integrity(
+                        db, id=res.id, integrity_status=res.status, checksum=res.checksum, size=res.size
+                    )
+                await db.commit()
+
+            checked += len(rows)
+            last_id = rows[-1][0]
+            await asyncio.to_thread(write_checkpoint, CHECKPOINT_FILE, last_id)
+            print(f"checked up to id {last_id}: {checked} files, {flagged} flagged")
+
+    # full pass finished, the next run starts from the beginning
+    await asyncio.to_thread(CHECKPOINT_FILE.unlink, missing_ok=True)
+    print(f"pass complete: {checked} files checked, {flagged} flagged")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-runtime", type=float, default=None, help="stop after this many seconds (resumable)")
+    parser.add_argument("--mmap", action="store_true", help="hash through mmap instead of buffered reads")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start a new pass")
+    args = parser.parse_args()
+    if args.restart:
+        CHECKPOINT_FILE.unlink(missing_ok=True)
+    asyncio.run(scrub(args.max_runtime, args.mmap))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,52 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.api.v1.api import api_router
+from app.core import tracing
+from app.core.admission import UploadAdmissionMiddleware
 from app.core.config import settings
+from app.core.events import broker
+from app.core.loopmonitor import monitor
+from app.core.metrics import registry
+
+span_processor = tracing.processor_from_settings()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.start() # LISTEN connection for the event streams
+    if settings.LOOP_MONITOR_ENABLED:
+        await monitor.start()
+    yield
+    await monitor.stop()
+    await broker.stop()
+    if span_processor is not None:
+        span_processor.shutdown() # flushes queued spans
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
+if settings.UPLOAD_ADMISSION_ENABLED:
+    app.add_middleware(UploadAdmissionMiddleware, path=f"{settings.API_V1_STR}/audio/upload")
+
+if settings.TRACING_ENABLED:
+    # added last so it is the outermost middleware and the timings cover admission control too
+    app.add_middleware(
+        tracing.TracingMiddleware,
+        sample_rate=settings.TRACING_SAMPLE_RATE,
+        processor=span_processor,
+        trusted_proxies=[ip.strip() for ip in settings.TRACING_TRUSTED_PROXIES.split(",") if ip.strip()],
+    )
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 async def root():
-    return {"message": f"Welcome to {settings.PROJECT_NAME}"}
\ No newline at end of file
+    return {"message": f"Welcome to {settings.PROJECT_NAME}"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker process."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,2 +1,6 @@
 from .user import *
-from .audio import *
\ No newline at end of file
+from .audio import *
+from .idempotency import *
+from .library_stats import *
+from .fingerprint import *
+from .tombstone import *
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -11,7 +11,47 @@ class AudioFile(Base):
     stored_filename = Column(String, unique=True, nullable=False) # Unique filename on disk
     content_type = Column(String, nullable=True) # e.g., 'audio/mpeg'
     file_path = Column(String, nullable=False) # Relative path within UPLOAD_DIR
+    size = Column(BigInteger, nullable=True) # Size in bytes, recorded at upload
+    duration = Column(Float, nullable=True) # Duration in seconds, if known
+    checksum = Column(String(64), nullable=True) # SHA-256 hex digest, recorded at upload
+    integrity_status = Column(String, nullable=True) # set by the scrubber: 'ok', 'mismatch', 'truncated', 'missing' or 'unreadable'
+    verified_at = Column(DateTime(timezone=True), nullable=True) # last scrubber check
+    fingerprint_hash_count = Column(Integer, nullable=True) # number of stored fingerprint hashes
+    fingerprint_status = Column(String, nullable=True) # 'processing', 'ok' or 'failed', null until the fingerprint job ran
+    fingerprinted_at = Column(DateTime(timezone=True), nullable=True)
+    fingerprint_claimed_at = Column(DateTime(timezone=True), nullable=True) # when a job worker took the file
+    deleted_at = Column(DateTime(timezone=True), nullable=True) # soft-deleted, the file is removed by the reclaim job
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    owner = relationship("User")
\ No newline at end of file
+    owner = relationship("User")
+
+    __table_args__ = (
+        # trigram index for case-insensitive substring search (requires pg_trgm)
+        Index(
+            "ix_audio_files_original_filename_trgm",
+            "original_filename",
+            postgresql_using="gin",
+            postgresql_ops={"original_filename": "gin_trgm_ops"},
+        ),
+        # composite indexes for per-user filtering and sorting; id covers the paging tie-breaker
+        Index("ix_audio_files_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_audio_files_user_id_content_type_created_at", "user_id", "content_type", "created_at", "id"),
+        Index("ix_audio_files_user_id_original_filename", "user_id", "original_filename", "id"),
+        Index("ix_audio_files_user_id_size", "user_id", "size", "id"),
+        Index("ix_audio_files_user_id_duration", "user_id", "duration", "id"),
+        # only damaged files are indexed, so finding them stays cheap
+        Index(
+            "ix_audio_files_integrity_problems",
+            "integrity_status",
+            postgresql_where=text("integrity_status <> 'ok'"),
+        ),
+        # queue of files waiting for the fingerprint job
+        Index("ix_audio_files_fingerprint_pending", "id", postgresql_where=text("fingerprint_status IS NULL")),
+        # claims of the fingerprint job, to take over those of workers that died
+        Index(
+            "ix_audio_files_fingerprint_processing",
+            "fingerprint_claimed_at",
+            postgresql_where=text("fingerprint_status = 'processing'"),
+        ),
+    )
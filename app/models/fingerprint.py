@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class AudioFingerprint(Base):
+    """Inverted index of spectral peak hashes: hash -> (audio file, time offset)."""
+    __tablename__ = "audio_fingerprints"
+
+    hash = Column(Integer, primary_key=True)
+    audio_id = Column(Integer, ForeignKey("audio_files.id", ondelete="CASCADE"), primary_key=True)
+    time_offset = Column(Integer, primary_key=True) # STFT frame of the anchor peak
+
+    __table_args__ = (
+        Index("ix_audio_fingerprints_audio_id", "audio_id"), # for re-fingerprinting and cascading deletes
+    )
+
+class AudioDuplicate(Base):
+    """Likely duplicate pairs found by the fingerprint job, stored once with audio_id < duplicate_id."""
+    __tablename__ = "audio_duplicates"
+
+    audio_id = Column(Integer, ForeignKey("audio_files.id", ondelete="CASCADE"), primary_key=True)
+    duplicate_id = Column(Integer, ForeignKey("audio_files.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, nullable=False) # owner of audio_id
+    duplicate_user_id = Column(Integer, nullable=False) # owner of duplicate_id
+    matches = Column(Integer, nullable=False) # time-aligned hash matches
+    score = Column(Float, nullable=False) # matches relative to the smaller fingerprint
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_audio_duplicates_user_id_duplicate_user_id", "user_id", "duplicate_user_id"),
+        Index("ix_audio_duplicates_duplicate_id", "duplicate_id"),
+    )
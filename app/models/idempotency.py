@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False) # value of the Idempotency-Key header
+    request_hash = Column(String, nullable=False) # what the key was first used for, e.g. "POST /audio/upload"
+    status = Column(String, nullable=False, default="in_progress") # 'in_progress' or 'completed'
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True) # JSON, null for empty responses
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class UserLibraryStats(Base):
+    """Per-user totals, maintained in the same transaction as every upload and delete."""
+    __tablename__ = "user_library_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    file_count = Column(BigInteger, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0") # bumped by every change to the user's files
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class UserLibraryStatsBreakdown(Base):
+    """Per-user totals by content type and (UTC) month of upload."""
+    __tablename__ = "user_library_stats_breakdown"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    content_type = Column(String, primary_key=True) # '' when the upload had no content type
+    month = Column(Date, primary_key=True) # first day of the month
+    file_count = Column(BigInteger, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
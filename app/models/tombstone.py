@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class StorageTombstone(Base):
+    """A stored file waiting to be removed from disk by the reclaim job."""
+    __tablename__ = "storage_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_path = Column(String, nullable=False) # relative path within UPLOAD_DIR at deletion time
+    # set while the AudioFile row is soft-deleted and can still be restored
+    audio_id = Column(Integer, ForeignKey("audio_files.id", ondelete="SET NULL"), nullable=True, unique=True)
+    purge_after = Column(DateTime(timezone=True), nullable=False, index=True) # end of the grace period / next retry
+    attempts = Column(Integer, nullable=False, default=0, server_default="0") # failed removal attempts
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,3 +1,4 @@
 from .user import *
 from .audio import *
-from .token import *
\ No newline at end of file
+from .token import *
+from .library_stats import *
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from enum import Enum
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class AudioBase(BaseModel):
     original_filename: str
@@ -20,9 +21,58 @@ class AudioInDBBase(AudioBase):
     created_at: datetime
     content_type: Optional[str] = None
     stored_filename: str
+    size: Optional[int] = None
+    duration: Optional[float] = None
+    checksum: Optional[str] = None
+    integrity_status: Optional[str] = None
+    fingerprint_status: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 class Audio(AudioInDBBase):
-    pass # API response model
\ No newline at end of file
+    pass # API response model
+
+class AudioSortField(str, Enum):
+    # a leading '-' means descending order
+    created_at = "created_at"
+    created_at_desc = "-created_at"
+    original_filename = "original_filename"
+    original_filename_desc = "-original_filename"
+    size = "size"
+    size_desc = "-size"
+    duration = "duration"
+    duration_desc = "-duration"
+
+class AudioFilter(BaseModel):
+    # query parameters for searching a user's library
+    q: Optional[str] = Field(None, description="Case-insensitive substring of the original filename")
+    content_type: Optional[str] = Field(None, description="Exact content type, e.g. 'audio/mpeg'")
+    created_from: Optional[datetime] = Field(None, description="Created at or after this moment")
+    created_to: Optional[datetime] = Field(None, description="Created before this moment")
+    min_size: Optional[int] = Field(None, ge=0, description="Minimum size in bytes")
+    max_size: Optional[int] = Field(None, ge=0, description="Maximum size in bytes")
+    min_duration: Optional[float] = Field(None, ge=0, description="Minimum duration in seconds")
+    max_duration: Optional[float] = Field(None, ge=0, description="Maximum duration in seconds")
+
+
+class SignedUrl(BaseModel):
+    url: str # relative to the API host
+    expires_at: datetime
+
+
+class AudioDuplicatePair(BaseModel):
+    audio: Audio
+    duplicate: Audio
+    matches: int # time-aligned fingerprint hash matches
+    score: float # 0..1, share of the smaller fingerprint that matched
+
+
+class AudioLookupRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, description="Audio ids; the response keeps this order")
+
+
+class AudioLookupResult(BaseModel):
+    items: List[Audio] # found files, in request order (repeated ids are repeated)
+    missing: List[int] # ids that don't exist or were deleted
+    forbidden: List[int] # ids of files owned by another user
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List
+
+class ContentTypeStats(BaseModel):
+    content_type: str # '' when unknown
+    file_count: int
+    total_bytes: int
+
+class MonthStats(BaseModel):
+    month: date # first day of the month (UTC)
+    file_count: int
+    total_bytes: int
+
+class LibraryStats(BaseModel):
+    file_count: int = 0
+    total_bytes: int = 0
+    by_content_type: List[ContentTypeStats] = []
+    by_month: List[MonthStats] = []
+
+class AdminLibraryStats(BaseModel):
+    user_count: int # users with at least one file
+    file_count: int
+    total_bytes: int
+    by_content_type: List[ContentTypeStats] = []